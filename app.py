@@ -1,8 +1,52 @@
+import contextlib
+import threading
+
 import dash
 
-app = dash.Dash()
+import http_cache
+import metrics
+import profiling
+import sessions
+
+class Dash(dash.Dash):
+    """
+    A Dash app whose callbacks can be registered while other threads dispatch requests, as demos are imported on first
+    visit (see index.py). Within `registering_callbacks()`, the registering thread adds its callbacks to a copy of the
+    callback map, which replaces the one seen by every other thread once the block completes. Only one thread may be
+    registering at a time.
+    """
+    def __init__(self, *args, **kwargs):
+        self._registering = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def callback_map(self):
+        return getattr(self._registering, 'callback_map', self._callback_map)
+
+    @callback_map.setter
+    def callback_map(self, callback_map):
+        self._callback_map = callback_map
+
+    @contextlib.contextmanager
+    def registering_callbacks(self):
+        self._registering.callback_map = dict(self._callback_map)
+        try:
+            yield
+            self._callback_map = self._registering.callback_map
+        finally:
+            del self._registering.callback_map
+
+
+app = Dash(__name__, compress=False)
 server = app.server
 app.config.suppress_callback_exceptions = True
+sessions.install(server)
+http_cache.install(server)
+metrics.install(app)
+profiling.install(server)
+
+def uid_prefix(sub_app_name):
+    return sub_app_name.replace('.', '-').replace('_', '-')
 
 def uid_gen(sub_app_name):
-    return lambda id_: '{}_{}'.format(sub_app_name.replace('.', '-').replace('_', '-'), id_)
+    return lambda id_: '{}_{}'.format(uid_prefix(sub_app_name), id_)
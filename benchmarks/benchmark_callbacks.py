@@ -0,0 +1,203 @@
+"""
+Callback latency benchmark.
+
+Drives every registered Dash callback in-process, through the Flask test client, over the grid of each of its inputs
+(one input at a time, the others at their layout defaults), and reports the cold and warm latency, the peak traced
+allocation and the response size of each configuration.
+
+Jobs (see jobs.py) run to completion inside the callback that submits them, in this process and with an empty job
+directory, so that their cases time the computation itself and no job is left running into the following cases. The
+callbacks polling a job are then driven with the id of the job submitted with the default inputs.
+
+    python benchmarks/benchmark_callbacks.py --save benchmarks/baseline.json
+    python benchmarks/benchmark_callbacks.py --baseline benchmarks/baseline.json --threshold 0.25
+
+With --baseline, exits with status 1 if any configuration got slower (or its payload larger) by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+os.environ['KOMM_DEMO_JOB_DIR'] = tempfile.mkdtemp(prefix='komm-demo-benchmark-jobs-')
+
+import dash_core_components as dcc
+import dash_html_components as html
+
+import index
+import jobs
+from app import app, server
+
+
+def run_jobs_inline():
+    submit = jobs.queue.submit
+    jobs.queue.submit = lambda key, compute, pooled=False, inline=False: submit(key, compute, inline=True)
+
+
+def find_components():
+    for app_id in index.app_menu:
+        index.load_demo(app_id)
+    layouts = [app.layout] + [app_dict['dash_layout'] for app_dict in index.app_menu.values()]
+    components = {}
+    for layout in layouts:
+        for component in [layout] + list(layout.traverse()):
+            if getattr(component, 'id', None) is not None:
+                components[component.id] = component
+    return components
+
+
+def input_grid(component, component_property, num_points):
+    if isinstance(component, dcc.Location) and component_property == 'pathname':
+        return ['/'] + ['/' + app_id for app_id in index.app_menu]
+    elif component is None:
+        return [None]
+    default = getattr(component, component_property, None)
+    if isinstance(component, dcc.Slider) and component_property == 'value':
+        minimum, maximum = getattr(component, 'min', None), getattr(component, 'max', None)
+        step = getattr(component, 'step', None)
+        if minimum is None or maximum is None:
+            return [default]
+        elif step is None:
+            marks = getattr(component, 'marks', None)
+            return sorted(marks) if marks else list(range(int(minimum), int(maximum) + 1))
+        num_steps = int(round((maximum - minimum) / step))
+        indices = range(num_steps + 1) if num_steps < num_points else [round(i * num_steps / (num_points - 1)) for i in range(num_points)]
+        return [round(minimum + i * step, 12) for i in indices]
+    elif isinstance(component, (dcc.Dropdown, dcc.RadioItems)) and component_property == 'value':
+        return [option['value'] for option in component.options]
+    elif isinstance(component, dcc.Checklist) and component_property == 'values':
+        return [[option['value'] for option in component.options], []]
+    elif isinstance(component, html.Button) and component_property == 'n_clicks':
+        return [default, 1]
+    return [default]
+
+
+def default_value(c, components, job_ids):
+    if c['property'] == 'children' and c['id'] in job_ids:
+        return job_ids[c['id']]
+    return getattr(components.get(c['id']), c['property'], None)
+
+
+def configurations(dependency, components, job_ids, num_points):
+    defaults = [default_value(c, components, job_ids) for c in dependency['inputs']]
+    yield 'default', defaults
+    for i, c in enumerate(dependency['inputs']):
+        if c['property'] == 'children' and c['id'] in job_ids:
+            continue
+        for value in input_grid(components.get(c['id']), c['property'], num_points):
+            if value == defaults[i]:
+                continue
+            values = list(defaults)
+            values[i] = value
+            yield '{}={}'.format(c['id'], json.dumps(value)), values
+
+
+def request_body(output_id, dependency, values, components):
+    return json.dumps({
+        'output': {'id': output_id.split('.')[0], 'property': output_id.split('.')[1]},
+        'inputs': [dict(c, value=value) for c, value in zip(dependency['inputs'], values)],
+        'state': [dict(c, value=getattr(components.get(c['id']), c['property'], None)) for c in dependency['state']],
+    })
+
+
+def run(num_points, repeat, only=None):
+    components = find_components()
+    run_jobs_inline()
+    client = server.test_client()
+    client.get('/')  # Sets the session cookie
+    # The callbacks submitting jobs go first, so that those polling them get the id of the first job submitted
+    job_ids = {view.id: None for view in jobs.views}
+    callbacks = sorted(app.callback_map.items(), key=lambda item: (item[0].split('.')[0] not in job_ids, item[0]))
+    results = {}
+    for output_id, dependency in callbacks:
+        if only and not any(pattern in output_id for pattern in only):
+            continue
+        results[output_id] = {}
+        for label, values in configurations(dependency, components, job_ids, num_points):
+            body = request_body(output_id, dependency, values, components)
+
+            def call():
+                response = client.post('/_dash-update-component', data=body, content_type='application/json')
+                if response.status_code not in (200, 204):
+                    raise RuntimeError('{} [{}] returned {}'.format(output_id, label, response.status_code))
+                return response
+
+            start = time.perf_counter()
+            response = call()
+            cold = time.perf_counter() - start
+            warm = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                call()
+                warm.append(time.perf_counter() - start)
+            tracemalloc.start()
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            job_id_component = output_id.split('.')[0]
+            if job_id_component in job_ids and job_ids[job_id_component] is None and response.status_code == 200:
+                job_ids[job_id_component] = json.loads(response.get_data())['response']['props']['children']
+
+            results[output_id][label] = {
+                'cold_ms': 1000 * cold,
+                'warm_ms': 1000 * statistics.median(warm) if warm else None,
+                'peak_kib': peak / 1024,
+                'payload_bytes': len(response.get_data()),
+            }
+            print('{:<70} {:<60} cold {:8.2f} ms  warm {:8.2f} ms  peak {:9.1f} KiB  payload {:9d} B'.format(
+                output_id[:70], label[:60], results[output_id][label]['cold_ms'], results[output_id][label]['warm_ms'] or 0.0,
+                results[output_id][label]['peak_kib'], results[output_id][label]['payload_bytes']))
+    return results
+
+
+def regressions(results, baseline, threshold, min_ms):
+    for output_id, configs in results.items():
+        for label, result in configs.items():
+            old = baseline.get(output_id, {}).get(label)
+            if old is None:
+                continue
+            for key in ['warm_ms', 'payload_bytes']:
+                if result[key] is None or old[key] is None:
+                    continue
+                slack = min_ms if key == 'warm_ms' else 0
+                if result[key] > old[key] * (1 + threshold) + slack:
+                    yield '{} [{}]: {} {:.2f} -> {:.2f}'.format(output_id, label, key, old[key], result[key])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every Dash callback over its input grid.')
+    parser.add_argument('--points', type=int, default=11, help='samples taken from continuous sliders (default: 11)')
+    parser.add_argument('--repeat', type=int, default=5, help='warm calls per configuration (default: 5)')
+    parser.add_argument('--only', nargs='*', help='only benchmark callbacks whose output id contains one of these')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression (default: 0.25)')
+    parser.add_argument('--min-ms', type=float, default=1.0, help='latency regressions below this many ms are ignored (default: 1.0)')
+    args = parser.parse_args()
+
+    results = run(args.points, args.repeat, args.only)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = list(regressions(results, baseline, args.threshold, args.min_ms))
+        for line in found:
+            print('REGRESSION', line)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Load test for the gunicorn deployment.
+
+Launches `gunicorn index:server` locally (as in the Procfile) for each requested worker configuration and replays, from
+many concurrent simulated sessions, the requests a browser makes: page navigation through `display_page` (followed by
+the initial callbacks of the new page) and drag bursts on a slider, each event posting the callbacks that depend on it
+with the current figure as state. Reports throughput and p50/p95/p99 latency per callback and configuration.
+
+    python benchmarks/load_test.py --workers 1 2 4 --threads 4 --sessions 16 --duration 30
+    python benchmarks/load_test.py --url http://localhost:8000 --sessions 8
+
+Requires `requests` and, unless --url is given, `gunicorn`.
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PAGES = ['/qam_modulation', '/psk_modulation', '/lfsr_sequence', '/raised_cosine_pulse', '/uniform_quantization']
+DEFAULT_DRAG = 'demo-qam-modulation_noise-power-db-slider.value'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    def __init__(self, workers, threads):
+        self.port = free_port()
+        self.url = 'http://127.0.0.1:{}'.format(self.port)
+        self._command = [
+            sys.executable, '-m', 'gunicorn', 'index:server',
+            '--bind', '127.0.0.1:{}'.format(self.port),
+            '--workers', str(workers),
+            '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+
+    def __enter__(self):
+        self._process = subprocess.Popen(self._command, cwd=ROOT)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError('gunicorn exited with status {}'.format(self._process.returncode))
+            try:
+                requests.get(self.url + '/_dash-layout', timeout=1)
+                return self
+            except requests.RequestException:  # Not listening, or the workers are still booting
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError('gunicorn did not start listening on {}'.format(self.url))
+
+    def __exit__(self, *args):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+def components(node):
+    if isinstance(node, list):
+        for child in node:
+            yield from components(child)
+    elif isinstance(node, dict) and 'props' in node:
+        if 'id' in node['props']:
+            yield node['props']
+        yield from components(node['props'].get('children'))
+
+
+def slider_values(props, num_steps, rng):
+    minimum, maximum = props['min'], props['max']
+    step = props.get('step') or 1
+    start = rng.uniform(minimum, maximum)
+    direction = rng.choice([-1, 1])
+    values = []
+    for i in range(num_steps):
+        value = start + direction * i * step * 10
+        if not minimum <= value <= maximum:
+            break
+        values.append(round(minimum + round((value - minimum) / step) * step, 12))
+    return values
+
+
+class Session:
+    """
+    One simulated browser tab: keeps its own cookie jar and the current value of every component property.
+    """
+    def __init__(self, url, dependencies, layout, record):
+        self.url = url
+        self.dependencies = dependencies
+        self.record = record
+        self.http = requests.Session()
+        self.props = {props['id']: dict(props) for props in components(layout)}
+
+    def fire(self, dependency):
+        output = dependency['output']
+        body = {
+            'output': output,
+            'inputs': [dict(c, value=self.props.get(c['id'], {}).get(c['property'])) for c in dependency['inputs']],
+            'state': [dict(c, value=self.props.get(c['id'], {}).get(c['property'])) for c in dependency['state']],
+        }
+        name = '{}.{}'.format(output['id'], output['property'])
+        start = time.perf_counter()
+        try:
+            response = self.http.post(self.url + '/_dash-update-component', json=body, timeout=60)
+            ok = response.status_code in (200, 204)
+        except requests.RequestException:
+            response, ok = None, False
+        self.record(name, time.perf_counter() - start, ok)
+        if ok and response.status_code == 200:
+            value = response.json()['response']['props'][output['property']]
+            self.props.setdefault(output['id'], {'id': output['id']})[output['property']] = value
+            return value
+
+    def set(self, component_id, component_property, value):
+        self.props.setdefault(component_id, {'id': component_id})[component_property] = value
+        for dependency in self.dependencies:
+            if any(c['id'] == component_id and c['property'] == component_property for c in dependency['inputs']):
+                self.fire(dependency)
+
+    def navigate(self, pathname):
+        self.props['url']['pathname'] = pathname
+        for dependency in self.dependencies:
+            if any(c['id'] == 'url' for c in dependency['inputs']):
+                children = self.fire(dependency)
+                new_ids = set()
+                for props in components(children):
+                    self.props[props['id']] = dict(props)
+                    new_ids.add(props['id'])
+                # Like dash-renderer, fire the callbacks whose outputs just appeared
+                for dependency in self.dependencies:
+                    if dependency['output']['id'] in new_ids:
+                        self.fire(dependency)
+
+
+def run_session(url, dependencies, layout, args, deadline, record, seed):
+    rng = random.Random(seed)
+    session = Session(url, dependencies, layout, record)
+    drag_id, drag_property = args.drag.rsplit('.', 1)
+    drag_page = '/' + drag_id.split('_')[0].replace('demo-', '').replace('-', '_')
+    session.http.get(url + '/', timeout=60)
+    try:
+        while time.monotonic() < deadline:
+            if rng.random() < args.navigate_probability:
+                session.navigate(rng.choice(args.pages))
+            else:
+                if session.props['url'].get('pathname') != drag_page:
+                    session.navigate(drag_page)
+                for value in slider_values(session.props[drag_id], args.burst, rng):
+                    if time.monotonic() >= deadline:
+                        break
+                    session.set(drag_id, drag_property, value)
+                    time.sleep(args.think / 1000)
+    finally:
+        session.http.close()  # Idle keep-alive connections would hold up the graceful shutdown of gunicorn
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def load(url, args):
+    dependencies = requests.get(url + '/_dash-dependencies', timeout=60).json()
+    layout = requests.get(url + '/_dash-layout', timeout=60).json()
+    samples = collections.defaultdict(list)
+    errors = collections.Counter()
+    lock = threading.Lock()
+
+    def record(name, elapsed, ok):
+        with lock:
+            if ok:
+                samples[name].append(elapsed)
+            else:
+                errors[name] += 1
+
+    start = time.monotonic()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(url, dependencies, layout, args, deadline, record, args.seed + i))
+        for i in range(args.sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    report = {}
+    for name in sorted(set(samples) | set(errors)):
+        latencies = samples[name]
+        report[name] = {
+            'requests': len(latencies),
+            'errors': errors[name],
+            'throughput_rps': len(latencies) / elapsed,
+            'p50_ms': 1000 * percentile(latencies, 50) if latencies else None,
+            'p95_ms': 1000 * percentile(latencies, 95) if latencies else None,
+            'p99_ms': 1000 * percentile(latencies, 99) if latencies else None,
+        }
+    all_latencies = [x for latencies in samples.values() for x in latencies]
+    report['total'] = {
+        'requests': len(all_latencies),
+        'errors': sum(errors.values()),
+        'throughput_rps': len(all_latencies) / elapsed,
+        'p50_ms': 1000 * percentile(all_latencies, 50) if all_latencies else None,
+        'p95_ms': 1000 * percentile(all_latencies, 95) if all_latencies else None,
+        'p99_ms': 1000 * percentile(all_latencies, 99) if all_latencies else None,
+    }
+    return report
+
+
+def print_report(title, report):
+    print(title)
+    print('  {:<64} {:>8} {:>6} {:>9} {:>9} {:>9} {:>9}'.format('callback', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, row in report.items():
+        print('  {:<64} {:>8} {:>6} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            name[:64], row['requests'], row['errors'], row['throughput_rps'],
+            row['p50_ms'] or 0.0, row['p95_ms'] or 0.0, row['p99_ms'] or 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay browser callback traffic against gunicorn and report latency.')
+    parser.add_argument('--url', help='load an already running server instead of launching gunicorn')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2], help='gunicorn worker counts to try (default: 1 2)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[4], help='gunicorn threads per worker to try (default: 4)')
+    parser.add_argument('--sessions', type=int, default=8, help='concurrent simulated sessions (default: 8)')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load per configuration (default: 20)')
+    parser.add_argument('--drag', default=DEFAULT_DRAG, help='slider dragged in bursts, as <id>.<property> (default: {})'.format(DEFAULT_DRAG))
+    parser.add_argument('--burst', type=int, default=20, help='slider events per drag burst (default: 20)')
+    parser.add_argument('--think', type=float, default=30, help='milliseconds between drag events (default: 30)')
+    parser.add_argument('--pages', nargs='+', default=DEFAULT_PAGES, help='pages visited between bursts')
+    parser.add_argument('--navigate-probability', type=float, default=0.2, help='chance of a page visit instead of a burst (default: 0.2)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the reports to this JSON file')
+    args = parser.parse_args()
+
+    reports = {}
+    if args.url:
+        reports[args.url] = load(args.url, args)
+        print_report(args.url, reports[args.url])
+    else:
+        for workers in args.workers:
+            for threads in args.threads:
+                title = 'workers={} threads={}'.format(workers, threads)
+                with Server(workers, threads) as server:
+                    reports[title] = load(server.url, args)
+                print_report(title, reports[title])
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import concurrent.futures
+import math
+import time
+
+import komm
+import numpy as np
+
+import config
+import jobs
+from cache import make_key
+from slicer import Slicer
+
+EBNO_DB = np.arange(0.0, 26.0, 2.0)
+THEORY_EBNO_DB = np.arange(0.0, 26.0, 0.25)
+MIN_ERROR_RATE = 1e-7  # Points whose theoretical symbol error rate is below this are not simulated
+Z_95 = 1.959964
+SEED = 0
+
+
+def make_modulation(kind, arguments):
+    if kind == 'psk':
+        return komm.PSKModulation(**arguments)
+    elif kind == 'qam':
+        return komm.QAModulation(**arguments)
+    raise ValueError("Parameter 'kind' must be in {'psk', 'qam'}")
+
+
+def _qfunc(x):
+    return 0.5 * np.vectorize(math.erfc)(np.asarray(x) / np.sqrt(2))
+
+
+def is_gray_labeling(modulation):
+    """
+    Whether the labels of every pair of nearest neighbours (as seen from either point) differ in exactly one bit.
+    """
+    constellation = modulation.constellation
+    labels = np.asarray(modulation.labeling)
+    distances = np.abs(constellation[:, np.newaxis] - constellation[np.newaxis, :])
+    np.fill_diagonal(distances, np.inf)
+    nearest = distances <= distances.min(axis=1, keepdims=True) * (1 + 1e-6)
+    differing = labels[:, np.newaxis] ^ labels[np.newaxis, :]
+    num_bits = sum((differing >> bit) & 1 for bit in range(modulation.bits_per_symbol))
+    return bool(np.all(num_bits[nearest] == 1))
+
+
+def theoretical_error_rates(kind, arguments, ebno_db):
+    """
+    Symbol and bit error rates over AWGN. For QAM the symbol error rate is exact (per-axis decisions); for PSK it is
+    exact for orders 2 and 4 and the usual nearest-neighbour approximation otherwise. Bit error rates assume Gray
+    labeling (one bit error per symbol error), and are meaningless otherwise (see `is_gray_labeling`).
+    """
+    modulation = make_modulation(kind, arguments)
+    constellation = modulation.constellation
+    energy_per_symbol = np.mean(np.abs(constellation)**2)
+    n0 = energy_per_symbol / modulation.bits_per_symbol / 10**(np.asarray(ebno_db) / 10)
+    sigma = np.sqrt(n0 / 2)
+    if kind == 'qam':
+        orders = arguments['orders']
+        orders = orders if np.ndim(orders) else (int(np.sqrt(orders)), ) * 2
+        amplitudes = np.broadcast_to(arguments['base_amplitudes'], 2)
+        correct = 1.0
+        for order, amplitude in zip(orders, amplitudes):
+            correct = correct * (1 - 2*(1 - 1/order)*_qfunc(amplitude / sigma))
+        ser = 1 - correct
+    else:
+        order = modulation.order
+        amplitude = np.sqrt(energy_per_symbol)
+        if order == 2:
+            ser = _qfunc(amplitude / sigma)
+        elif order == 4:
+            q = _qfunc(amplitude / np.sqrt(2) / sigma)
+            ser = 2*q - q**2
+        else:
+            ser = 2*_qfunc(amplitude * np.sin(np.pi / order) / sigma)
+    return ser, ser / modulation.bits_per_symbol
+
+
+def simulate_batches(kind, arguments, ebno_db, num_batches, seed):
+    """
+    Runs `num_batches` batches of `BER_BATCH_SIZE` uniformly random symbols through an AWGN channel at the given Eb/N0
+    with hard decisions (see slicer.py), and returns `(num_symbols, symbol_errors, bit_errors)`. Runs in pool workers.
+    """
+    modulation = make_modulation(kind, arguments)
+    constellation = modulation.constellation
+    slicer = Slicer(constellation, rotation=arguments['phase_offset'] if kind == 'qam' else 0.0)
+    labels = np.asarray(modulation.labeling)
+    differing = labels[:, np.newaxis] ^ labels[np.newaxis, :]
+    bit_error_table = sum((differing >> bit) & 1 for bit in range(modulation.bits_per_symbol))
+    n0 = np.mean(np.abs(constellation)**2) / modulation.bits_per_symbol / 10**(ebno_db / 10)
+
+    random_state = np.random.RandomState(seed)
+    num_symbols = symbol_errors = bit_errors = 0
+    for _ in range(num_batches):
+        sent = random_state.randint(modulation.order, size=config.BER_BATCH_SIZE)
+        noise = random_state.standard_normal(2*config.BER_BATCH_SIZE).view(np.complex128) * np.sqrt(n0 / 2)
+        decided = slicer(constellation[sent] + noise)
+        num_symbols += len(sent)
+        symbol_errors += int(np.count_nonzero(decided != sent))
+        bit_errors += int(bit_error_table[sent, decided].sum())
+    return num_symbols, symbol_errors, bit_errors
+
+
+def _wilson_interval(errors, trials):
+    trials = np.maximum(trials, 1)
+    p = errors / trials
+    center = (p + Z_95**2 / (2*trials)) / (1 + Z_95**2 / trials)
+    half_width = Z_95 * np.sqrt(p*(1 - p)/trials + Z_95**2/(4*trials**2)) / (1 + Z_95**2 / trials)
+    return center - half_width, center + half_width
+
+
+def _converged(num_symbols, symbol_errors):
+    # Enough errors, or a 95% confidence interval narrow enough relative to the estimate (see config.py)
+    if symbol_errors >= config.BER_TARGET_ERRORS:
+        return True
+    if symbol_errors == 0:
+        return False
+    low, high = _wilson_interval(symbol_errors, num_symbols)
+    return (high - low) / 2 <= config.BER_TARGET_PRECISION / 100 * symbol_errors / num_symbols
+
+
+def _split(num_batches, num_tasks):
+    num_tasks = min(num_tasks, num_batches)
+    return [num_batches // num_tasks + (task < num_batches % num_tasks) for task in range(num_tasks)]
+
+
+def error_rate_curve(kind, arguments, progress=None):
+    """
+    Monte Carlo symbol and bit error rates at every point of `EBNO_DB`, spread over a process pool. Points are refined
+    in rounds: every point not yet converged (see `_converged`) and still short of `BER_MAX_SYMBOLS` symbols runs twice
+    as many batches as in its previous round (but no more than what is left of its cap), split over its share of the
+    workers. If given, `progress` is called with the fraction of points done after every round.
+    """
+    theory_ser, _ = theoretical_error_rates(kind, arguments, EBNO_DB)
+    num_points = len(EBNO_DB)
+    totals = np.zeros((num_points, 3), dtype=np.int64)  # Symbols, symbol errors, bit errors
+    batches = np.ones(num_points, dtype=int)
+    pending = [i for i in range(num_points) if theory_ser[i] >= MIN_ERROR_RATE]
+    simulated = np.zeros(num_points, dtype=bool)
+    simulated[pending] = True
+    max_batches = max(config.BER_MAX_SYMBOLS // config.BER_BATCH_SIZE, 1)
+
+    start = time.perf_counter()
+    round_index = 0
+    while pending:
+        tasks_per_point = max(jobs.num_workers() // len(pending), 1)
+        futures = {}
+        for i in pending:
+            num_batches = min(batches[i], max_batches - totals[i, 0] // config.BER_BATCH_SIZE)
+            for task, task_batches in enumerate(_split(int(num_batches), tasks_per_point)):
+                future = jobs.executor().submit(simulate_batches, kind, arguments, EBNO_DB[i], task_batches, [SEED, i, round_index, task])
+                futures[future] = i
+        for future in concurrent.futures.as_completed(futures):
+            totals[futures[future]] += future.result()
+        batches[pending] *= 2
+        pending = [i for i in pending if not _converged(*totals[i, :2]) and totals[i, 0] < max_batches * config.BER_BATCH_SIZE]
+        round_index += 1
+        if progress is not None:
+            progress(1 - len(pending) / max(np.count_nonzero(simulated), 1))
+    elapsed = time.perf_counter() - start
+
+    modulation = make_modulation(kind, arguments)
+    num_symbols, symbol_errors, bit_errors = totals.T
+    num_bits = num_symbols * modulation.bits_per_symbol
+    capped = np.array([not _converged(*totals[i, :2]) for i in range(num_points)])
+    theory_ser, theory_ber = theoretical_error_rates(kind, arguments, THEORY_EBNO_DB)
+    return {
+        'title': str(modulation),
+        'ebno_db': EBNO_DB[simulated],
+        'num_symbols': num_symbols[simulated],
+        'ser': (symbol_errors / np.maximum(num_symbols, 1))[simulated],
+        'ser_interval': [bound[simulated] for bound in _wilson_interval(symbol_errors, num_symbols)],
+        'ber': (bit_errors / np.maximum(num_bits, 1))[simulated],
+        'ber_interval': [bound[simulated] for bound in _wilson_interval(bit_errors, num_bits)],
+        'capped': capped[simulated],
+        'zero_errors': (symbol_errors == 0)[simulated],
+        'theory_ebno_db': THEORY_EBNO_DB,
+        'theory_ser': theory_ser,
+        'theory_ber': theory_ber,
+        'gray_labeling': is_gray_labeling(modulation),
+        'elapsed': elapsed,
+        'workers': jobs.num_workers(),
+    }
+
+
+def submit_error_rate_curve(kind, arguments):
+    """
+    Starts (or joins) the background job computing `error_rate_curve`, and returns its id (see jobs.py).
+    """
+    key = make_key(dict(arguments, kind=kind, job='error_rate_curve'))
+    return jobs.queue.submit(key, lambda progress: error_rate_curve(kind, arguments, progress))
@@ -0,0 +1,104 @@
+import collections
+import hashlib
+import sys
+import threading
+
+import numpy as np
+
+
+def make_key(parameters):
+    return tuple(sorted(
+        (name, round(value, 12) if isinstance(value, float) else value)
+        for name, value in parameters.items()
+    ))
+
+
+def digest(key):
+    return hashlib.md5(repr(key).encode()).hexdigest()[:16]
+
+
+def sizeof(value, _seen=None):
+    # Views are charged the whole array they keep alive, once per entry however many views of it the entry holds.
+    # Objects (such as the per-session demo states, see sessions.py) are charged their attributes.
+    seen = set() if _seen is None else _seen
+    if isinstance(value, np.ndarray):
+        while isinstance(value.base, np.ndarray):
+            value = value.base
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        return value.nbytes
+    elif isinstance(value, dict):
+        return sum(sizeof(v, seen) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        return sum(sizeof(v, seen) for v in value)
+    elif hasattr(value, '__dict__') and not isinstance(value, type):
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        return sys.getsizeof(value) + sizeof(list(vars(value).values()), seen)
+    else:
+        return sys.getsizeof(value)
+
+
+_missing = object()
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache, bounded both in number of entries and in (approximate) bytes.
+    """
+    def __init__(self, max_size=128, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def get(self, key, compute):
+        value = self.lookup(key, _missing)
+        if value is _missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._num_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._num_bytes += size
+            while len(self._entries) > self.max_size or (self.max_bytes is not None and self._num_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._num_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'bytes': self._num_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,82 @@
+import os
+import tempfile
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# Memoization of demo simulations (see cache.py)
+RESULT_CACHE_MAX_SIZE = _env_int('KOMM_DEMO_RESULT_CACHE_MAX_SIZE', 64)
+RESULT_CACHE_MAX_BYTES = _env_int('KOMM_DEMO_RESULT_CACHE_MAX_BYTES', 32 * 2**20)
+
+# Per-session demo state (see sessions.py)
+SESSION_TTL = _env_int('KOMM_DEMO_SESSION_TTL', 30 * 60)
+SESSION_STORE_MAX_SIZE = _env_int('KOMM_DEMO_SESSION_STORE_MAX_SIZE', 256)
+SESSION_STORE_MAX_BYTES = _env_int('KOMM_DEMO_SESSION_STORE_MAX_BYTES', 64 * 2**20)
+
+# Demos imported at worker boot instead of on first visit (comma-separated ids from app_menu.json, or 'all')
+EAGER_DEMOS = [app_id for app_id in os.environ.get('KOMM_DEMO_EAGER', '').split(',') if app_id]
+
+# Shared pool of Gaussian noise samples for the AWGN demos (see noise.py)
+NOISE_RESERVOIR_SIZE = _env_int('KOMM_DEMO_NOISE_RESERVOIR_SIZE', 2**16)
+NOISE_RESERVOIR_SEED = _env_int('KOMM_DEMO_NOISE_RESERVOIR_SEED', 0)
+NOISE_RESERVOIR_REFRESH_EVERY = _env_int('KOMM_DEMO_NOISE_RESERVOIR_REFRESH_EVERY', 256)
+
+# Largest number of points sent per trace by the demos that decimate their traces (see dsp.minmax_decimate)
+PLOT_MAX_POINTS = _env_int('KOMM_DEMO_PLOT_MAX_POINTS', 2000)
+
+# Largest degree offered by the LFSR demo (at most 24, see dsp.PRIMITIVE_POLYNOMIALS)
+LFSR_MAX_DEGREE = _env_int('KOMM_DEMO_LFSR_MAX_DEGREE', 20)
+
+# Largest length offered by the Walsh-Hadamard demo (as log2), and largest side of its matrix heatmap before averaging
+WALSH_HADAMARD_MAX_LOG_LENGTH = _env_int('KOMM_DEMO_WALSH_HADAMARD_MAX_LOG_LENGTH', 12)
+HEATMAP_MAX_SIZE = _env_int('KOMM_DEMO_HEATMAP_MAX_SIZE', 128)
+
+# Number of samples generated and processed at a time by the streaming demos
+STREAM_CHUNK_SIZE = _env_int('KOMM_DEMO_STREAM_CHUNK_SIZE', 2**16)
+
+# Number of random input samples behind the SQNR analysis of the uniform quantization demo
+QUANTIZER_ANALYSIS_SAMPLES = _env_int('KOMM_DEMO_QUANTIZER_ANALYSIS_SAMPLES', 2**20)
+
+# Fill the response tables of the pulse demos when they are loaded, instead of one slider step at a time (see tables.py)
+PRECOMPUTE_TABLES = bool(_env_int('KOMM_DEMO_PRECOMPUTE_TABLES', 0))
+
+# Background jobs (see jobs.py): process pool size (0 means one per CPU), jobs run at once per worker, where results
+# persist (a directory private to the user running the app) and how many are kept, after how many seconds without a
+# heartbeat a running job is considered abandoned (e.g. by a restarted worker), after how many seconds without anyone
+# polling it a job is cancelled, and how often pages poll their jobs (in ms)
+JOB_WORKERS = _env_int('KOMM_DEMO_JOB_WORKERS', 0)
+JOB_MAX_RUNNING = _env_int('KOMM_DEMO_JOB_MAX_RUNNING', 2)
+JOB_DIR = os.environ.get('KOMM_DEMO_JOB_DIR', os.path.join(tempfile.gettempdir(), 'komm-demo-jobs-{}'.format(os.getuid())))
+JOB_MAX_RESULTS = _env_int('KOMM_DEMO_JOB_MAX_RESULTS', 256)
+JOB_STALE_AFTER = _env_int('KOMM_DEMO_JOB_STALE_AFTER', 30)
+JOB_IDLE_TIMEOUT = _env_int('KOMM_DEMO_JOB_IDLE_TIMEOUT', 15)
+JOB_POLL_INTERVAL = _env_int('KOMM_DEMO_JOB_POLL_INTERVAL', 500)
+
+# Monte Carlo error-rate curves of the modulation demos (see ber.py): a point stops once it has this many symbol errors,
+# or once the 95% confidence interval of its symbol error rate is within this percentage of the estimate, or once it
+# has run this many symbols
+BER_BATCH_SIZE = _env_int('KOMM_DEMO_BER_BATCH_SIZE', 2**16)
+BER_TARGET_ERRORS = _env_int('KOMM_DEMO_BER_TARGET_ERRORS', 100)
+BER_TARGET_PRECISION = _env_int('KOMM_DEMO_BER_TARGET_PRECISION', 20)
+BER_MAX_SYMBOLS = _env_int('KOMM_DEMO_BER_MAX_SYMBOLS', 2**25)
+
+# Rendering of the Gaussian clouds in the constellation demos (see plotting.py); coordinates are rounded to this many
+# decimal digits below the order of magnitude of the noise standard deviation
+WEBGL_CLOUDS = bool(_env_int('KOMM_DEMO_WEBGL_CLOUDS', 1))
+CLOUD_DIGITS = _env_int('KOMM_DEMO_CLOUD_DIGITS', 2)
+
+# HTTP caching and compression (see http_cache.py)
+COMPRESS_LEVEL = _env_int('KOMM_DEMO_COMPRESS_LEVEL', 6)
+COMPRESS_MIN_SIZE = _env_int('KOMM_DEMO_COMPRESS_MIN_SIZE', 500)
+COMPRESSED_CACHE_MAX_BYTES = _env_int('KOMM_DEMO_COMPRESSED_CACHE_MAX_BYTES', 16 * 2**20)
+STATIC_MAX_AGE = _env_int('KOMM_DEMO_STATIC_MAX_AGE', 365 * 24 * 3600)
+
+# Per-callback latency and payload histograms, served on /metrics (see metrics.py)
+METRICS_ENABLED = bool(_env_int('KOMM_DEMO_METRICS', 1))
+
+# On-demand profiling of callback requests carrying this token (see profiling.py); empty disables it
+PROFILE_TOKEN = os.environ.get('KOMM_DEMO_PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('KOMM_DEMO_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'komm-demo-profiles'))
+PROFILE_MAX_LINES = _env_int('KOMM_DEMO_PROFILE_MAX_LINES', 100)
@@ -0,0 +1,168 @@
+import abc
+import threading
+
+import dash_core_components as dcc
+from dash.dependencies import Input
+import plotly.graph_objs as go
+
+import komm
+import numpy as np
+
+import ber
+import jobs
+import metrics
+import noise
+from cache import digest, make_key
+from plotting import cloud_trace, compact, error_rate_figure, segments_trace_data, set_title, update_trace
+from slicer import Slicer
+
+
+class ConstellationDemo(abc.ABC):
+    """
+    Per-session state of a constellation demo (PSK or QAM). Subclasses set `kind` (as in ber.make_modulation), the
+    number of cloud samples per constellation point, their own `cache`, and `modulation_arguments`, which maps the demo
+    parameters (but the noise power) to the keyword arguments of the komm modulation.
+    """
+    kind = None
+    symbols_per_point = 100
+    cache = None
+
+    @staticmethod
+    @abc.abstractmethod
+    def modulation_arguments(**parameters):
+        pass
+
+    def __init__(self, **kwargs):
+        self._lock = threading.Lock()
+        self._parameters = kwargs
+        self._update_output()
+
+    def update_parameters(self, **kwargs):
+        with self._lock:
+            if kwargs != self._parameters:
+                self._parameters = kwargs
+                self._update_output()
+            return self.output
+
+    def __getitem__(self, key):
+        return self._parameters.get(key, None)
+
+    @metrics.phase('simulate')
+    def _update_output(self):
+        # The noise power only scales the noise, so it is left out of the cache key
+        configuration = {key: value for key, value in self._parameters.items() if key != 'noise_power_db'}
+        simulation = self.cache.get(make_key(configuration), lambda: self._simulate(configuration))
+        noise_amplitude = 10**(self._parameters['noise_power_db'] / 20)
+        gaussian_clouds = noise_amplitude * simulation['unit_noise']
+        gaussian_clouds += simulation['sentword']
+        self.output = dict(
+            simulation,
+            gaussian_clouds=gaussian_clouds,
+            noise_std=noise_amplitude / np.sqrt(2),  # Per dimension
+            constellation_uid=digest(make_key(configuration)),
+            gaussian_clouds_uid=digest(make_key(self._parameters)),
+        )
+
+    def _simulate(self, configuration):
+        arguments = self.modulation_arguments(**configuration)
+        modulation = ber.make_modulation(self.kind, arguments)
+        modulation._constellation = np.round(modulation._constellation, 12)  # Only for pedagogical reasons
+        order = modulation.order
+        num_symbols = self.symbols_per_point * order
+        # The clouds only need uniformly distributed constellation points, so draw symbol indices directly instead of bits
+        symbols = np.random.randint(order, size=num_symbols, dtype=np.min_scalar_type(order - 1))
+        sentword = modulation.constellation[symbols]
+        # Copied (once per cached configuration), since a view would keep a whole reservoir pool alive in the cache
+        # after the reservoir refreshes; changing only the noise power scales this copy, with no random numbers drawn
+        unit_noise = noise.reservoir.take(num_symbols).copy()
+        slicer = Slicer(modulation.constellation, rotation=arguments['phase_offset'] if self.kind == 'qam' else 0.0)
+
+        return {
+            'title': str(modulation),
+            'constellation': modulation.constellation,
+            'labels': [''.join(str(b) for b in komm.int2binlist(modulation.labeling[i], width=modulation.bits_per_symbol)) for i in range(order)],
+            'sentword': sentword,
+            'unit_noise': unit_noise,
+            'decision_boundaries': segments_trace_data(slicer.boundaries()),
+        }
+
+
+def constellation_figure(axis_range=None):
+    axis_range = {} if axis_range is None else {'range': axis_range}
+    return go.Figure(
+        data=[
+            go.Scatter(
+                name='Constellation',
+                mode='markers+text',
+                textposition='top center',
+                marker={'color': 'red'},
+                textfont = {'size': 10},
+                visible=True,
+            ),
+            cloud_trace(
+                name='Gaussian clouds',
+                marker={'size': 2, 'color': 'rgba(0, 0, 255, 0.2)'},
+                visible='legendonly',
+            ),
+            go.Scatter(
+                name='Decision regions',
+                mode='lines',
+                line={'color': 'gray', 'dash': 'dot', 'width': 1},
+                hoverinfo='none',
+                visible='legendonly',
+            ),
+        ],
+
+        layout=go.Layout(
+            xaxis=dict(
+                title='Re',
+                **axis_range
+            ),
+            yaxis=dict(
+                title='Im',
+                scaleanchor = 'x',
+                **axis_range
+            ),
+            hovermode='closest',
+        ),
+    )
+
+
+def update_constellation_figure(figure, output, parameters_label):
+    constellation_trace, gaussian_clouds_trace, decision_regions_trace = figure['data']
+    update_trace(
+        constellation_trace,
+        output['constellation_uid'],
+        x=np.real(output['constellation']),
+        y=np.imag(output['constellation']),
+        text=output['labels'],
+    )
+    update_trace(
+        decision_regions_trace,
+        output['constellation_uid'],
+        **output['decision_boundaries']
+    )
+    update_trace(
+        gaussian_clouds_trace,
+        output['gaussian_clouds_uid'],
+        x=compact(np.real(output['gaussian_clouds']), output['noise_std']),
+        y=compact(np.imag(output['gaussian_clouds']), output['noise_std']),
+    )
+    set_title(figure, output['title'], parameters_label)
+    return figure
+
+
+def error_rate_view(app, uid, submit, states):
+    """
+    The job view (see jobs.JobView) of the error-rate curve of a constellation demo, submitted by `submit(n_clicks,
+    *values of states)` when the error-rate button is clicked and drawn in the error-rate graphs div.
+    """
+    job_view = jobs.JobView(
+        app, uid, 'error-rate-job', uid('error-rate-graphs'),
+        inputs=[Input(component_id=uid('error-rate-button'), component_property='n_clicks')],
+        submit=submit,
+        states=states,
+        restart_action='click the button again',
+    )
+    job_view.render(lambda output: [dcc.Graph(figure=error_rate_figure(output), id=uid('error-rate-figure'))])
+    return job_view
@@ -0,0 +1,252 @@
+import functools
+import time
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input
+import plotly.graph_objs as go
+
+import komm
+import numpy as np
+
+import config
+import dsp
+import jobs
+from cache import make_key
+
+PAYLOAD_LENGTH = 256
+HIT_TOLERANCE = 1  # A peak up to this many samples away from a frame start still counts as a detection of that frame
+INLINE_MAX_LOG_NUM_SAMPLES = 6  # Simulated in about 0.1 s, so right in the callback rather than polled for
+SEED = 0
+
+def stream_chunks(preamble, num_samples, noise_power_db, chunk_size):
+    # Noisy BPSK stream of frames, each made of the preamble followed by random payload symbols; never held whole in memory
+    random_state = np.random.RandomState(SEED)
+    frame_length = len(preamble) + PAYLOAD_LENGTH
+    noise_amplitude = 10**(noise_power_db / 20)
+    for start in range(0, num_samples, chunk_size):
+        positions = np.arange(start, min(start + chunk_size, num_samples)) % frame_length
+        symbols = 1.0 - 2.0*random_state.randint(2, size=len(positions))
+        in_preamble = positions < len(preamble)
+        symbols[in_preamble] = preamble[positions[in_preamble]]
+        yield symbols + noise_amplitude*random_state.standard_normal(len(positions))
+
+def simulate(length, log_num_samples, noise_power_db, threshold, progress):
+    preamble = komm.BarkerSequence(length=length).polar_sequence.astype(float)
+    num_samples = 10**log_num_samples
+    frame_length = length + PAYLOAD_LENGTH
+    window = min(num_samples, 4*frame_length)
+
+    correlator = dsp.OverlapSaveCorrelator(preamble)
+    detector = dsp.PeakDetector(threshold=threshold*length, min_distance=length)
+    decimator = dsp.MinMaxDecimator(num_samples - length + 1, config.PLOT_MAX_POINTS)
+    received_head, correlation_head, window_peaks = [], [], []
+    num_correlated = num_detected = num_false_alarms = 0
+
+    def count(peaks):
+        # Peaks are tallied as they come, and only those in the displayed window are kept
+        nonlocal num_detected, num_false_alarms
+        offsets = np.array([position for position, _ in peaks], dtype=int) % frame_length
+        hits = np.minimum(offsets, frame_length - offsets) <= HIT_TOLERANCE
+        num_detected += int(np.count_nonzero(hits))
+        num_false_alarms += int(np.count_nonzero(~hits))
+        window_peaks.extend(peak for peak in peaks if peak[0] < window)
+
+    def consume(correlation):
+        nonlocal num_correlated
+        if num_correlated < window:
+            correlation_head.append(correlation[:window - num_correlated])
+        num_correlated += len(correlation)
+        decimator.push(correlation)
+        count(detector.process(correlation))
+
+    start = time.perf_counter()
+    num_received = 0
+    for chunk in stream_chunks(preamble, num_samples, noise_power_db, config.STREAM_CHUNK_SIZE):
+        if num_received < window:
+            received_head.append(chunk[:window - num_received])
+        num_received += len(chunk)
+        consume(correlator.process(chunk))
+        progress(num_received / num_samples)
+    consume(correlator.flush())
+    count(detector.flush())
+    elapsed = time.perf_counter() - start
+
+    num_frames = (num_samples - length) // frame_length + 1
+    envelope_x, envelope_y = decimator.result()
+
+    return {
+        'length': length,
+        'threshold': threshold,
+        'received': np.concatenate(received_head),
+        'correlation': np.concatenate(correlation_head),
+        'frame_starts': np.arange(0, window, frame_length),
+        'peak_positions': np.array([position for position, _ in window_peaks], dtype=int),
+        'peak_values': np.array([value for _, value in window_peaks], dtype=float),
+        'envelope_x': envelope_x,
+        'envelope_y': envelope_y,
+        'num_samples': num_samples,
+        'num_frames': num_frames,
+        'num_detected': num_detected,
+        'num_false_alarms': num_false_alarms,
+        'elapsed': elapsed,
+        'fft_size': correlator.fft_size,
+        'hop': correlator.hop,
+    }
+
+def submit_simulation(length, log_num_samples, noise_power_db, threshold):
+    parameters = dict(length=length, log_num_samples=log_num_samples, noise_power_db=noise_power_db, threshold=threshold)
+    return jobs.queue.submit(make_key(dict(parameters, job='barker_detection')), functools.partial(simulate, **parameters), pooled=True, inline=log_num_samples <= INLINE_MAX_LOG_NUM_SAMPLES)
+
+
+from app import app, uid_gen
+
+uid = uid_gen(__name__)
+
+job_view = jobs.JobView(
+    app, uid, 'job', uid('graphs'),
+    inputs=[Input(component_id=uid('length-slider'), component_property='value'),
+            Input(component_id=uid('log-num-samples-slider'), component_property='value'),
+            Input(component_id=uid('noise-power-db-slider'), component_property='value'),
+            Input(component_id=uid('threshold-slider'), component_property='value')],
+    submit=submit_simulation,
+)
+
+layout = html.Div([
+    html.Div(
+        id=uid('graphs'),
+        style={'width': '78%'},
+    ),
+
+    html.Div([
+        html.P(
+            'Preamble length:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('length-slider'),
+            min=2,
+            max=13,
+            value=13,
+            marks={length: str(length) for length in [2, 3, 4, 5, 7, 11, 13]},
+            step=None,
+        ),
+        html.P(
+            'Number of samples:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('log-num-samples-slider'),
+            min=4,
+            max=7,
+            value=5,
+            marks={4: '10k', 5: '100k', 6: '1M', 7: '10M'},
+            step=None,
+        ),
+        html.P(
+            'Noise power (dB):',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('noise-power-db-slider'),
+            min=-10.0,
+            max=10.0,
+            value=-10.0,
+            marks={-10: '-10', 0: '0', 10: '10'},
+            step=0.5,
+        ),
+        html.P(
+            'Threshold (fraction of the preamble length):',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('threshold-slider'),
+            min=0.1,
+            max=1.0,
+            value=0.85,
+            marks={0.1: '0.1', 0.5: '0.5', 1.0: '1.0'},
+            step=0.05,
+        )] + job_view.layout,
+
+        style={'width': '20%', 'flex-grow:': '1'},
+    ),
+
+], style={'display': 'flex'})
+
+@job_view.render
+def barker_detection_update(output):
+    length, threshold = output['length'], output['threshold']
+    threshold_line = {'type': 'line', 'xref': 'paper', 'x0': 0, 'x1': 1, 'y0': threshold*length, 'y1': threshold*length, 'line': {'color': 'red', 'dash': 'dash', 'width': 1}}
+
+    figure_window = dcc.Graph(
+        figure=go.Figure(
+            data=[
+                go.Scatter(
+                    name='Received signal',
+                    x=np.arange(len(output['received'])),
+                    y=np.round(output['received'], 3),
+                    mode='lines',
+                    line={'color': 'rgba(0, 0, 255, 0.3)', 'width': 1},
+                ),
+                go.Scatter(
+                    name='Matched filter output',
+                    x=np.arange(len(output['correlation'])),
+                    y=np.round(output['correlation'], 3),
+                    mode='lines',
+                    line={'color': 'black'},
+                ),
+                go.Scatter(
+                    name='Preamble starts',
+                    x=output['frame_starts'],
+                    y=np.full(len(output['frame_starts']), length),
+                    mode='markers',
+                    marker={'symbol': 'triangle-down', 'size': 10, 'color': 'green'},
+                ),
+                go.Scatter(
+                    name='Detections',
+                    x=output['peak_positions'],
+                    y=np.round(output['peak_values'], 3),
+                    mode='markers',
+                    marker={'size': 8, 'color': 'red'},
+                ),
+            ],
+            layout=go.Layout(
+                title='Beginning of the stream',
+                xaxis=dict(
+                    title='n',
+                ),
+                shapes=[threshold_line],
+                margin={'l': 60, 'b': 60, 't': 80, 'r': 60},
+            ),
+        ),
+        id=uid('window-figure'),
+    )
+
+    figure_envelope = dcc.Graph(
+        figure=go.Figure(
+            data=[
+                go.Scatter(
+                    x=output['envelope_x'],
+                    y=np.round(output['envelope_y'], 3),
+                    mode='lines',
+                    line={'color': 'black', 'width': 1},
+                ),
+            ],
+            layout=go.Layout(
+                title='Matched filter output over the whole stream (min/max decimated)',
+                xaxis=dict(
+                    title='n',
+                ),
+                shapes=[threshold_line],
+                margin={'l': 60, 'b': 60, 't': 80, 'r': 60},
+            ),
+        ),
+        id=uid('envelope-figure'),
+    )
+
+    summary = html.P('Frames: {:,} | Detected: {:,} | Missed: {:,} | False alarms: {:,} | Processed {:,} samples in {:.3f} s ({:.1f} Msamples/s), with FFT size {} (hop {}) and chunks of {:,} samples'.format(
+        output['num_frames'], output['num_detected'], output['num_frames'] - output['num_detected'], output['num_false_alarms'],
+        output['num_samples'], output['elapsed'], output['num_samples'] / output['elapsed'] / 1e6,
+        output['fft_size'], output['hop'], config.STREAM_CHUNK_SIZE))
+
+    return [figure_window, figure_envelope, summary]
@@ -0,0 +1,145 @@
+import functools
+import time
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input
+import plotly.graph_objs as go
+
+import numpy as np
+
+import config
+import dsp
+import jobs
+from cache import make_key
+
+SAMPLES_PER_SYMBOL = 32
+SPAN_IN_SYMBOLS = 16
+AMPLITUDE_RANGE = (-2.0, 2.0)
+AMPLITUDE_BINS = 128
+INLINE_MAX_LOG_NUM_SYMBOLS = 5  # Up to about 0.2 s of work, done right in the callback instead of as a polled job
+SEED = 0
+
+def simulate(rolloff, log_num_symbols, noise_power_db, progress):
+    random_state = np.random.RandomState(SEED)
+    num_symbols = 10**log_num_symbols
+    noise_amplitude = 10**(noise_power_db / 20)
+    chunk_size = max(config.STREAM_CHUNK_SIZE // SAMPLES_PER_SYMBOL, 1)
+
+    interpolator = dsp.PolyphaseInterpolator(dsp.raised_cosine_taps(rolloff, SAMPLES_PER_SYMBOL, SPAN_IN_SYMBOLS), SAMPLES_PER_SYMBOL)
+    eye = dsp.EyeHistogram(SAMPLES_PER_SYMBOL, SPAN_IN_SYMBOLS * SAMPLES_PER_SYMBOL // 2, AMPLITUDE_RANGE, AMPLITUDE_BINS)
+
+    start = time.perf_counter()
+    for chunk_start in range(0, num_symbols, chunk_size):
+        symbols = 1.0 - 2.0*random_state.randint(2, size=min(chunk_size, num_symbols - chunk_start))
+        waveform = interpolator.process(symbols)
+        eye.push(waveform + noise_amplitude*random_state.standard_normal(len(waveform)))
+        progress((chunk_start + len(symbols)) / num_symbols)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'rolloff': rolloff,
+        'density': np.round(np.log10(1 + eye.counts), 2),
+        'num_symbols': num_symbols,
+        'elapsed': elapsed,
+    }
+
+def submit_simulation(rolloff, log_num_symbols, noise_power_db):
+    parameters = dict(rolloff=rolloff, log_num_symbols=log_num_symbols, noise_power_db=noise_power_db)
+    return jobs.queue.submit(make_key(dict(parameters, job='eye_diagram')), functools.partial(simulate, **parameters), pooled=True, inline=log_num_symbols <= INLINE_MAX_LOG_NUM_SYMBOLS)
+
+
+from app import app, uid_gen
+
+uid = uid_gen(__name__)
+
+job_view = jobs.JobView(
+    app, uid, 'job', uid('graphs'),
+    inputs=[Input(component_id=uid('rolloff-slider'), component_property='value'),
+            Input(component_id=uid('log-num-symbols-slider'), component_property='value'),
+            Input(component_id=uid('noise-power-db-slider'), component_property='value')],
+    submit=submit_simulation,
+)
+
+layout = html.Div([
+    html.Div(
+        id=uid('graphs'),
+        style={'width': '78%'},
+    ),
+
+    html.Div([
+        html.P(
+            'Rolloff:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('rolloff-slider'),
+            min=0.05,
+            max=1.0,
+            value=0.5,
+            marks={0.05: '0.05', 0.5: '0.5', 1: '1.0'},
+            step=0.05,
+        ),
+        html.P(
+            'Number of symbols:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('log-num-symbols-slider'),
+            min=4,
+            max=6,
+            value=5,
+            marks={4: '10k', 5: '100k', 6: '1M'},
+            step=None,
+        ),
+        html.P(
+            'Noise power (dB):',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('noise-power-db-slider'),
+            min=-40.0,
+            max=0.0,
+            value=-30.0,
+            marks={-40: '-40', -20: '-20', 0: '0'},
+            step=1.0,
+        )] + job_view.layout,
+
+        style={'width': '20%', 'flex-grow:': '1'},
+    ),
+
+], style={'display': 'flex'})
+
+@job_view.render
+def eye_diagram_update(output):
+    low, high = AMPLITUDE_RANGE
+
+    figure_eye = dcc.Graph(
+        figure=go.Figure(
+            data=[
+                go.Heatmap(
+                    z=output['density'],
+                    x0=-1.0,
+                    dx=1 / SAMPLES_PER_SYMBOL,
+                    y0=low + (high - low) / AMPLITUDE_BINS / 2,
+                    dy=(high - low) / AMPLITUDE_BINS,
+                    colorscale='Viridis',
+                    colorbar={'title': 'log10(1 + count)'},
+                ),
+            ],
+            layout=go.Layout(
+                title='Eye diagram (rolloff {:.2f}, {:,} symbols, computed in {:.2f} s)'.format(output['rolloff'], output['num_symbols'], output['elapsed']),
+                xaxis=dict(
+                    title='t / T',
+                ),
+                yaxis=dict(
+                    title='Amplitude',
+                ),
+                margin={'l': 60, 'b': 60, 't': 80, 'r': 60},
+            ),
+        ),
+        style={'height': '600px'},
+        id=uid('eye-figure'),
+    )
+
+    return [figure_eye]
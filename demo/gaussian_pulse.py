@@ -3,6 +3,10 @@ import dash_html_components as html
 from dash.dependencies import Input, Output
 import plotly.graph_objs as go
 
+import config
+import metrics
+from tables import ResponseTable
+
 from app import app, uid_gen
 
 uid = uid_gen(__name__)
@@ -35,6 +39,18 @@ layout = html.Div([
 import komm
 import numpy as np
 
+t = np.linspace(-8.0, 8.0, 1000)
+f = np.linspace(-4.0, 4.0, 500)
+
+def evaluate(half_power_bandwidth):
+    pulse = komm.GaussianPulse(half_power_bandwidth, length_in_symbols=4)
+    return {'h': pulse.impulse_response(t), 'H': pulse.frequency_response(f), 'H0': pulse.frequency_response(0.0)}
+
+# One row per step of the half-power bandwidth slider
+table = ResponseTable(evaluate, minimum=0.05, maximum=1.0, step=0.01)
+if config.PRECOMPUTE_TABLES:
+    table.fill()
+
 @app.callback(
     Output(component_id=uid('half-power-bandwidth-label'), component_property='children'),
     [Input(component_id=uid('half-power-bandwidth-slider'), component_property='value')]
@@ -48,18 +64,16 @@ def _(half_power_bandwidth):
 )
 def gaussian_pulse_update(half_power_bandwidth):
     Bh = half_power_bandwidth
-    pulse = komm.GaussianPulse(Bh, length_in_symbols=4)
-    h = pulse.impulse_response
-    H = pulse.frequency_response
-    t = np.linspace(-8.0, 8.0, 1000)
-    f = np.linspace(-4.0, 4.0, 500)
+    with metrics.phase('simulate'):
+        responses = table[half_power_bandwidth]
+    H0 = float(responses['H0'])
 
     figure_impulse_response = dcc.Graph(
         figure=go.Figure(
             data=[
                 go.Scatter(
                     x=t,
-                    y=h(t),
+                    y=responses['h'],
                     mode='lines',
                     line=dict(
                         color='blue',
@@ -88,7 +102,7 @@ def gaussian_pulse_update(half_power_bandwidth):
             data=[
                 go.Scatter(
                     x=f,
-                    y=H(f),
+                    y=responses['H'],
                     mode='lines',
                     line=dict(
                         color='red',
@@ -96,7 +110,7 @@ def gaussian_pulse_update(half_power_bandwidth):
                 ),
                 go.Scatter(
                     x=[-Bh, -Bh, None, Bh, Bh, None, -Bh, Bh],
-                    y=[0, H(0)/np.sqrt(2), None, 0, H(0)/np.sqrt(2), None, H(0)/np.sqrt(2), H(0)/np.sqrt(2)],
+                    y=[0, H0/np.sqrt(2), None, 0, H0/np.sqrt(2), None, H0/np.sqrt(2), H0/np.sqrt(2)],
                     mode='lines',
                     line=dict(
                         color='gray',
@@ -112,7 +126,7 @@ def gaussian_pulse_update(half_power_bandwidth):
                 ),
                 yaxis=dict(
                     title='H(f)',
-                    range=[-0.1*H(0), 1.1*H(0)],
+                    range=[-0.1*H0, 1.1*H0],
                 ),
                 margin={'l': 60, 'b': 60, 't': 80, 'r': 60},
             ),
@@ -3,6 +3,11 @@ import dash_html_components as html
 from dash.dependencies import Input, Output
 import plotly.graph_objs as go
 
+import config
+import dsp
+import metrics
+from cache import LRUCache, make_key
+
 from app import app, uid_gen
 
 uid = uid_gen(__name__)
@@ -14,10 +19,10 @@ layout = html.Div([
         dcc.Slider(
             id=uid('degree-slider'),
             min=2,
-            max=7,
+            max=config.LFSR_MAX_DEGREE,
             value=2,
-            marks={length: str(length) for length in range(2, 8)},
-            step=None,
+            marks={degree: str(degree) for degree in range(2, config.LFSR_MAX_DEGREE + 1) if degree == 2 or degree % 4 == 0},
+            step=1,
             updatemode='drag',
         )
     ], style={'margin-bottom': '25px', 'align': 'center'}),
@@ -29,25 +34,54 @@ layout = html.Div([
 
 # ---
 
-import komm
 import numpy as np
 
+cache = LRUCache(max_size=config.RESULT_CACHE_MAX_SIZE, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+metrics.register_cache('lfsr_sequence', cache)
+
+def simulate(degree):
+    feedback_polynomial = dsp.PRIMITIVE_POLYNOMIALS[degree]
+    polar_sequence = 1 - 2*dsp.lfsr_sequence(feedback_polynomial).astype(np.int8)
+    length = polar_sequence.size
+
+    # A two-valued sequence decimated would be a solid band, so long sequences are shown through a window of their
+    # first samples instead, sent as one vertex per run (the 'hv' line shape draws the rest)
+    window = polar_sequence[:config.PLOT_MAX_POINTS]
+    run_starts = np.flatnonzero(np.concatenate([[True], window[1:] != window[:-1]]))
+    sequence_x = np.append(run_starts, len(window))
+    sequence_y = np.append(window[run_starts], window[-1])
+
+    # A single period of the autocorrelation, l = 0, ..., L, of which only the ends of its flat stretches are sent (the
+    # points in between do not change the line drawn)
+    autocorrelation = np.round(dsp.cyclic_autocorrelation(polar_sequence, normalized=True), 4)
+    autocorrelation = np.append(autocorrelation, autocorrelation[0])
+    kept = np.concatenate([[True], (autocorrelation[1:-1] != autocorrelation[:-2]) | (autocorrelation[1:-1] != autocorrelation[2:]), [True]])
+
+    return {
+        'title': 'LFSRSequence(feedback_polynomial={})'.format(bin(feedback_polynomial)),
+        'length': length,
+        'window': len(window),
+        'sequence_x': sequence_x,
+        'sequence_y': sequence_y,
+        'shifts': np.flatnonzero(kept),
+        'autocorrelation': autocorrelation[kept],
+    }
+
 
 @app.callback(
     Output(component_id=uid('graphs'), component_property='children'),
     [Input(component_id=uid('degree-slider'), component_property='value')]
 )
 def lfsr_sequence_update(degree):
-    lfsr = komm.LFSRSequence.maximum_length_sequence(degree=degree)
-    length = lfsr.length
-    shifts = np.arange(-2*length + 1, 2*length)
+    with metrics.phase('simulate'):
+        output = cache.get(make_key(dict(degree=degree)), lambda: simulate(degree))
 
     figure_sequence = dcc.Graph(
         figure=go.Figure(
             data=[
                 go.Scatter(
-                    x=np.arange(length + 1),
-                    y=np.pad(lfsr.polar_sequence, (0, 1), mode='edge'),
+                    x=output['sequence_x'],
+                    y=output['sequence_y'],
                     mode='lines',
                     line=dict(
                         shape='hv',
@@ -55,7 +89,7 @@ def lfsr_sequence_update(degree):
                 ),
             ],
             layout=go.Layout(
-                title=str(lfsr),
+                title=output['title'] if output['window'] == output['length'] else '{}<br>First {:,} of {:,} samples'.format(output['title'], output['window'], output['length']),
                 yaxis=dict(
                     title='a[n]',
                     dtick=1.0,
@@ -71,8 +105,8 @@ def lfsr_sequence_update(degree):
         figure=go.Figure(
             data=[
                 go.Scatter(
-                    x=shifts,
-                    y=lfsr.cyclic_autocorrelation(shifts, normalized=True),
+                    x=output['shifts'],
+                    y=output['autocorrelation'],
                     mode='lines',
                 ),
             ],
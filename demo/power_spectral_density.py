@@ -0,0 +1,183 @@
+import functools
+import time
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input
+import plotly.graph_objs as go
+
+import komm
+import numpy as np
+
+import config
+import dsp
+import jobs
+from cache import make_key
+
+SAMPLES_PER_SYMBOL = 8
+SPAN_IN_SYMBOLS = 16
+SEGMENT_LENGTH = 1024
+INLINE_MAX_LOG_NUM_SYMBOLS = 5  # Estimated in a few tens of ms, so right in the callback rather than as a polled job
+REPORT_INTERVAL = 0.25  # s
+SEED = 0
+
+def pulse_taps(pulse, parameter):
+    if pulse == 'gaussian':
+        t = dsp.tap_times(SAMPLES_PER_SYMBOL, SPAN_IN_SYMBOLS)
+        return komm.GaussianPulse(parameter, length_in_symbols=SPAN_IN_SYMBOLS).impulse_response(t)
+    return dsp.raised_cosine_taps(parameter, SAMPLES_PER_SYMBOL, SPAN_IN_SYMBOLS)
+
+def analytic_psd(pulse, parameter, f):
+    # Equiprobable ±1 symbols at unit rate: the PSD is |H(f)|² itself
+    if pulse == 'gaussian':
+        H = komm.GaussianPulse(parameter, length_in_symbols=SPAN_IN_SYMBOLS).frequency_response(f)
+    else:
+        H = komm.RaisedCosinePulse(parameter, length_in_symbols=SPAN_IN_SYMBOLS).frequency_response(f)
+    return np.abs(H)**2
+
+
+def estimate(pulse, parameter, log_num_symbols, progress):
+    """
+    Welch estimate of the PSD of a pulse-shaped random waveform, computed chunk by chunk as a background job (see
+    jobs.py). The waveform is never held whole in memory, and the estimate so far is reported as a partial result.
+    """
+    num_symbols = 10**log_num_symbols
+    random_state = np.random.RandomState(SEED)
+    chunk_size = max(config.STREAM_CHUNK_SIZE // SAMPLES_PER_SYMBOL, 1)
+    interpolator = dsp.PolyphaseInterpolator(pulse_taps(pulse, parameter), SAMPLES_PER_SYMBOL)
+    estimator = dsp.WelchEstimator(SEGMENT_LENGTH, sample_rate=SAMPLES_PER_SYMBOL)
+
+    def snapshot(num_symbols_done):
+        _, psd = estimator.psd()
+        return {
+            'pulse': pulse,
+            'parameter': parameter,
+            'log_num_symbols': log_num_symbols,
+            'psd': psd,
+            'num_symbols_done': num_symbols_done,
+            'num_segments': estimator.num_segments,
+            'elapsed': time.perf_counter() - start,
+        }
+
+    start = last_report = time.perf_counter()
+    for chunk_start in range(0, num_symbols, chunk_size):
+        symbols = 1.0 - 2.0*random_state.randint(2, size=min(chunk_size, num_symbols - chunk_start))
+        estimator.push(interpolator.process(symbols))
+        num_symbols_done = chunk_start + len(symbols)
+        if estimator.num_segments > 0 and (last_report == start or time.perf_counter() - last_report >= REPORT_INTERVAL):
+            progress(num_symbols_done / num_symbols, partial=snapshot(num_symbols_done))
+            last_report = time.perf_counter()
+    return snapshot(num_symbols)
+
+def submit_estimation(pulse, parameter, log_num_symbols):
+    key = make_key(dict(pulse=pulse, parameter=parameter, log_num_symbols=log_num_symbols, job='power_spectral_density'))
+    return jobs.queue.submit(key, functools.partial(estimate, pulse, parameter, log_num_symbols), pooled=True, inline=log_num_symbols <= INLINE_MAX_LOG_NUM_SYMBOLS)
+
+frequencies = np.fft.fftshift(np.fft.fftfreq(SEGMENT_LENGTH, 1 / SAMPLES_PER_SYMBOL))
+
+
+from app import app, uid_gen
+
+uid = uid_gen(__name__)
+
+job_view = jobs.JobView(
+    app, uid, 'job', uid('graphs'),
+    inputs=[Input(component_id=uid('pulse-radio'), component_property='value'),
+            Input(component_id=uid('parameter-slider'), component_property='value'),
+            Input(component_id=uid('log-num-symbols-slider'), component_property='value')],
+    submit=submit_estimation,
+)
+
+layout = html.Div([
+    html.Div(
+        id=uid('graphs'),
+        style={'width': '78%'},
+    ),
+
+    html.Div([
+        html.P(
+            'Pulse:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.RadioItems(
+            id=uid('pulse-radio'),
+            options=[
+                {'label': 'Raised cosine (rolloff)', 'value': 'raised_cosine'},
+                {'label': 'Gaussian (half-power bandwidth)', 'value': 'gaussian'},
+            ],
+            value='raised_cosine',
+        ),
+        html.P(
+            'Shape parameter:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('parameter-slider'),
+            min=0.05,
+            max=1.0,
+            value=0.5,
+            marks={0.05: '0.05', 0.5: '0.5', 1: '1.0'},
+            step=0.05,
+        ),
+        html.P(
+            'Number of symbols:',
+            style={'margin-top': '32px'},
+        ),
+        dcc.Slider(
+            id=uid('log-num-symbols-slider'),
+            min=4,
+            max=7,
+            value=5,
+            marks={4: '10k', 5: '100k', 6: '1M', 7: '10M'},
+            step=None,
+        )] + job_view.layout,
+
+        style={'width': '20%', 'flex-grow:': '1'},
+    ),
+
+], style={'display': 'flex'})
+
+@job_view.render
+def power_spectral_density_update(snapshot):
+    # The estimate so far (the final one once the job is done), along with the parameters it was computed for
+    pulse, parameter, log_num_symbols = snapshot['pulse'], snapshot['parameter'], snapshot['log_num_symbols']
+    data = [
+        go.Scatter(
+            name='Welch estimate',
+            x=frequencies,
+            y=np.round(10*np.log10(np.maximum(snapshot['psd'], 1e-12)), 3),
+            mode='lines',
+            line={'color': 'blue'},
+        ),
+        go.Scatter(
+            name='Analytic',
+            x=frequencies,
+            y=np.round(10*np.log10(np.maximum(analytic_psd(pulse, parameter, frequencies), 1e-12)), 3),
+            mode='lines',
+            line={'color': 'black', 'dash': 'dash'},
+        ),
+    ]
+    progress_label = '{:,} of {:,} symbols ({} segments of {} samples) in {:.2f} s'.format(
+        snapshot['num_symbols_done'], 10**log_num_symbols, snapshot['num_segments'], SEGMENT_LENGTH, snapshot['elapsed'])
+
+    figure_psd = dcc.Graph(
+        figure=go.Figure(
+            data=data,
+            layout=go.Layout(
+                title='Power spectral density<br>{}'.format(progress_label),
+                xaxis=dict(
+                    title='f / R',
+                    range=[-SAMPLES_PER_SYMBOL / 2, SAMPLES_PER_SYMBOL / 2],
+                ),
+                yaxis=dict(
+                    title='S(f) (dB)',
+                    range=[-80.0, 5.0],
+                ),
+                margin={'l': 60, 'b': 60, 't': 80, 'r': 60},
+            ),
+        ),
+        style={'height': '600px'},
+        id=uid('psd-figure'),
+    )
+
+    return [figure_psd]
@@ -3,6 +3,10 @@ import dash_html_components as html
 from dash.dependencies import Input, Output
 import plotly.graph_objs as go
 
+import config
+import metrics
+from tables import ResponseTable
+
 from app import app, uid_gen
 
 uid = uid_gen(__name__)
@@ -35,6 +39,18 @@ layout = html.Div([
 import komm
 import numpy as np
 
+t = np.linspace(-8.0, 8.0, 800)
+f = np.linspace(-1.5, 1.5, 150)
+
+def evaluate(rolloff):
+    pulse = komm.RaisedCosinePulse(rolloff, length_in_symbols=20)
+    return {'h': pulse.impulse_response(t), 'H': pulse.frequency_response(f)}
+
+# One row per step of the rolloff slider
+table = ResponseTable(evaluate, minimum=0.0, maximum=1.0, step=0.01)
+if config.PRECOMPUTE_TABLES:
+    table.fill()
+
 @app.callback(
     Output(component_id=uid('rolloff-label'), component_property='children'),
     [Input(component_id=uid('rolloff-slider'), component_property='value')]
@@ -47,18 +63,15 @@ def _(rolloff):
     [Input(component_id=uid('rolloff-slider'), component_property='value')]
 )
 def raised_cosine_update(rolloff):
-    pulse = komm.RaisedCosinePulse(rolloff, length_in_symbols=20)
-    h = pulse.impulse_response
-    H = pulse.frequency_response
-    t = np.linspace(-8.0, 8.0, 800)
-    f = np.linspace(-1.5, 1.5, 150)
+    with metrics.phase('simulate'):
+        responses = table[rolloff]
 
     figure_impulse_response = dcc.Graph(
         figure=go.Figure(
             data=[
                 go.Scatter(
                     x=t,
-                    y=h(t),
+                    y=responses['h'],
                     mode='lines',
                     line=dict(
                         color='blue',
@@ -87,7 +100,7 @@ def raised_cosine_update(rolloff):
             data=[
                 go.Scatter(
                     x=f,
-                    y=H(f),
+                    y=responses['H'],
                     mode='lines',
                     line=dict(
                         color='red',
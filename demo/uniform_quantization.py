@@ -1,3 +1,5 @@
+import threading
+
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
@@ -6,75 +8,119 @@ import plotly.graph_objs as go
 import komm
 import numpy as np
 
+import config
+import dsp
+import metrics
+from cache import LRUCache, digest, make_key
+from plotting import set_title, update_trace
+from sessions import SessionStore, session_id
+
 class UniformQuantizationDemo:
+    cache = LRUCache(max_size=config.RESULT_CACHE_MAX_SIZE, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+
     def __init__(self, **kwargs):
+        self._lock = threading.Lock()
         self._parameters = kwargs
-        self._simulate()
+        self._update_output()
 
     def update_parameters(self, **kwargs):
-        if kwargs != self._parameters:
-            self._parameters = kwargs
-            self._simulate()
+        with self._lock:
+            if kwargs != self._parameters:
+                self._parameters = kwargs
+                self._update_output()
+            return self.output
 
     def __getitem__(self, key):
         return self._parameters.get(key, None)
 
+    @metrics.phase('simulate')
+    def _update_output(self):
+        key = make_key(self._parameters)
+        self.output = dict(self.cache.get(key, self._simulate), uid=digest(key))
+
     def _simulate(self):
         num_levels = self._parameters['num_levels']
         input_peak = self._parameters['input_peak']
         choice = self._parameters['choice']
 
         quantizer = komm.UniformQuantizer(num_levels, input_peak, choice)
-        x = np.linspace(-2.0*input_peak, 2.0*input_peak, 1000)
-        y = quantizer(x)
+        # The staircase is exact with one vertex per decision cell, drawn with the 'hv' line shape: the output holds
+        # each level from its lower threshold up to the next one, where it steps (inputs equal to a threshold go up)
+        x = np.concatenate([[-2.0*input_peak], quantizer.thresholds, [2.0*input_peak]])
+        y = np.concatenate([quantizer.levels, quantizer.levels[-1:]])
 
-        self.output = {
+        return {
             'title': str(quantizer),
             'input_signal': x,
             'output_signal': y,
         }
 
-demo = UniformQuantizationDemo(
+metrics.register_cache('uniform_quantization', UniformQuantizationDemo.cache)
+
+default_parameters = dict(
     num_levels=4,
     input_peak=1.0,
     choice='mid-riser',
 )
 
+demos = SessionStore(factory=lambda: UniformQuantizationDemo(**default_parameters))
+
+ANALYSIS_NUM_LEVELS = np.arange(2, 33)
+ANALYSIS_CHOICES = ['unsigned', 'mid-riser', 'mid-tread']
+ANALYSIS_SEED = 0
+
+analysis_cache = LRUCache(max_size=config.RESULT_CACHE_MAX_SIZE, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+metrics.register_cache('uniform_quantization_analysis', analysis_cache)
+
+def analyze(input_peak):
+    # Every number of levels and choice at once, for a fixed input uniform on [-1, 1], so only the input peak matters
+    quantizers = [komm.UniformQuantizer(num_levels, input_peak, choice) for choice in ANALYSIS_CHOICES for num_levels in ANALYSIS_NUM_LEVELS]
+    statistics = dsp.QuantizationErrorStatistics(quantizers)
+    random_state = np.random.RandomState(ANALYSIS_SEED)
+    num_samples = config.QUANTIZER_ANALYSIS_SAMPLES
+    for start in range(0, num_samples, config.STREAM_CHUNK_SIZE):
+        statistics.push(random_state.uniform(-1.0, 1.0, size=min(config.STREAM_CHUNK_SIZE, num_samples - start)))
+    shape = (len(ANALYSIS_CHOICES), len(ANALYSIS_NUM_LEVELS))
+    return {key: np.round(values.reshape(shape), 4) for key, values in statistics.result().items()}
+
 
 from app import app, uid_gen
 
 uid = uid_gen(__name__)
 
 layout = html.Div([
-    html.Div(
+    html.Div([
         dcc.Graph(
             id=uid('quantizer-graph'),
         ),
+        dcc.Graph(
+            id=uid('analysis-graph'),
+        )],
         style={'width': '78%'},
     ),
 
     html.Div([
         html.P(
+            'Number of levels:',
             style={'margin-top': '32px'},
-            id=uid('num-levels-label'),
         ),
         dcc.Slider(
             id=uid('num-levels-slider'),
             min=2,
             max=32,
-            value=demo['num_levels'],
+            value=default_parameters['num_levels'],
             marks={2**i: str(2**i) for i in range(1, 6)},
             updatemode='drag',
         ),
         html.P(
+            'Input peak:',
             style={'margin-top': '32px'},
-            id=uid('input-peak-label'),
         ),
         dcc.Slider(
             id=uid('input-peak-slider'),
             min=0.1,
             max=2.0,
-            value=demo['input_peak'],
+            value=default_parameters['input_peak'],
             marks={0.1: '0.1', 1: '1.0', 2: '2.0'},
             step=0.01,
             updatemode='drag',
@@ -90,7 +136,7 @@ layout = html.Div([
                 {'label': 'Signed (mid-riser)', 'value': 'mid-riser'},
                 {'label': 'Signed (mid-tread)', 'value': 'mid-tread'},
             ],
-            value=demo['choice'],
+            value=default_parameters['choice'],
             clearable=False,
         )],
 
@@ -99,20 +145,6 @@ layout = html.Div([
 
 ], style={'display': 'flex'})
 
-@app.callback(
-    Output(component_id=uid('num-levels-label'), component_property='children'),
-    [Input(component_id=uid('num-levels-slider'), component_property='value')]
-)
-def _(num_levels):
-    return 'Numer of levels: {}'.format(num_levels)
-
-@app.callback(
-    Output(component_id=uid('input-peak-label'), component_property='children'),
-    [Input(component_id=uid('input-peak-slider'), component_property='value')]
-)
-def _(input_peak):
-    return 'Input peak: {:.2f}'.format(input_peak)
-
 @app.callback(
     Output(component_id=uid('quantizer-graph'), component_property='figure'),
     [Input(component_id=uid('num-levels-slider'), component_property='value'),
@@ -122,54 +154,102 @@ def _(input_peak):
     [State(component_id=uid('quantizer-graph'), component_property='figure')]
 )
 def uniform_quantization_update(num_levels, input_peak, choice, relayoutData, figure):
-    demo.update_parameters(
+    output = demos.get(session_id()).update_parameters(
         num_levels=num_levels,
         input_peak=input_peak,
         choice=choice,
     )
 
-    old_layout = figure['layout'] if figure else None
-    old_data = figure['data'] if figure else None
-
-    figure = go.Figure(
-        data=[
-            go.Scatter(
-                name='Characteristic curve',
-                x=demo.output['input_signal'],
-                y=demo.output['output_signal'],
-                textposition='top center',
-                marker={'color': 'red'},
-                textfont = {'size': 10},
-                visible=True,
-            ),
-        ],
+    if not figure:
+        figure = go.Figure(
+            data=[
+                go.Scatter(
+                    name='Characteristic curve',
+                    mode='lines',
+                    line={'shape': 'hv'},
+                    textposition='top center',
+                    marker={'color': 'red'},
+                    textfont = {'size': 10},
+                    visible=True,
+                ),
+            ],
 
-        layout=go.Layout(
-            xaxis=dict(
-                title='Input',
-                range=(-2.1, 2.1),
-            ),
-            yaxis=dict(
-                title='Output',
-                range=(-2.1, 2.1),
-                scaleanchor = 'x',
+            layout=go.Layout(
+                xaxis=dict(
+                    title='Input',
+                    range=(-2.1, 2.1),
+                ),
+                yaxis=dict(
+                    title='Output',
+                    range=(-2.1, 2.1),
+                    scaleanchor = 'x',
+                ),
+                hovermode='closest',
             ),
-            hovermode='closest',
-        ),
-    )
+        )
 
-    if old_layout:
-        figure['layout'] = old_layout
+    update_trace(
+        figure['data'][0],
+        output['uid'],
+        x=output['input_signal'],
+        y=output['output_signal'],
+    )
 
-    figure['layout']['title'] = demo.output['title']
+    parameters_label = 'Number of levels: {} | Input peak: {:.2f}'.format(num_levels, input_peak)
+    set_title(figure, output['title'], parameters_label)
 
     for axis in ['xaxis', 'yaxis']:
-        if figure['layout'][axis]['autorange']:
+        if figure['layout'][axis].get('autorange'):
             figure['layout'][axis]['autorange'] = False
             figure['layout'][axis]['range'] = (-2.1, 2.1)
 
-    if old_data:
-        for i, trace in enumerate(old_data):
-            figure['data'][i]['visible'] = trace['visible']
-
     return figure
+
+@app.callback(
+    Output(component_id=uid('analysis-graph'), component_property='figure'),
+    [Input(component_id=uid('num-levels-slider'), component_property='value'),
+     Input(component_id=uid('input-peak-slider'), component_property='value'),
+     Input(component_id=uid('choice-dropdown'), component_property='value')]
+)
+def uniform_quantization_analysis_update(num_levels, input_peak, choice):
+    with metrics.phase('simulate'):
+        output = analysis_cache.get(make_key(dict(input_peak=input_peak)), lambda: analyze(input_peak))
+
+    data = []
+    for i, analysis_choice in enumerate(ANALYSIS_CHOICES):
+        data.append(go.Scatter(
+            name=analysis_choice,
+            x=ANALYSIS_NUM_LEVELS,
+            y=output['sqnr_db'][i],
+            text=['Error mean: {:.4f}<br>Error RMS: {:.4f}<br>Max. |error|: {:.4f}'.format(*values)
+                  for values in zip(output['error_mean'][i], output['error_rms'][i], output['error_max'][i])],
+            mode='lines+markers',
+        ))
+    data.append(go.Scatter(
+        name='20 log10(L)',
+        x=ANALYSIS_NUM_LEVELS,
+        y=np.round(20*np.log10(ANALYSIS_NUM_LEVELS), 4),
+        mode='lines',
+        line={'color': 'gray', 'dash': 'dash'},
+    ))
+    data.append(go.Scatter(
+        name='Current',
+        x=[num_levels],
+        y=[output['sqnr_db'][ANALYSIS_CHOICES.index(choice)][num_levels - ANALYSIS_NUM_LEVELS[0]]],
+        mode='markers',
+        marker={'color': 'red', 'size': 12, 'symbol': 'circle-open', 'line': {'width': 2}},
+    ))
+
+    return go.Figure(
+        data=data,
+        layout=go.Layout(
+            title='SQNR for an input uniform on [-1, 1] ({:,} samples) | Input peak: {:.2f}'.format(config.QUANTIZER_ANALYSIS_SAMPLES, input_peak),
+            xaxis=dict(
+                title='Number of levels',
+            ),
+            yaxis=dict(
+                title='SQNR (dB)',
+            ),
+            hovermode='closest',
+        ),
+    )
@@ -3,6 +3,11 @@ import dash_html_components as html
 from dash.dependencies import Input, Output
 import plotly.graph_objs as go
 
+import config
+import dsp
+import metrics
+from cache import LRUCache, make_key
+
 from app import app, uid_gen
 
 uid = uid_gen(__name__)
@@ -19,9 +24,9 @@ layout = html.Div([
             dcc.Slider(
                 id=uid('length-slider'),
                 min=1,
-                max=7,
+                max=config.WALSH_HADAMARD_MAX_LOG_LENGTH,
                 value=1,
-                marks={i: str(2**i) for i in range(1, 8)},
+                marks={i: str(2**i) for i in range(1, config.WALSH_HADAMARD_MAX_LOG_LENGTH + 1)},
                 step=None,
                 updatemode='drag',
             )],
@@ -50,16 +55,53 @@ layout = html.Div([
                 step=1,
                 updatemode='drag',
             )],
+            style={'margin-bottom': '36px'},
+        ),
+
+        dcc.Checklist(
+            options=[
+                {'label': 'Show matrix', 'value': 'Show matrix'},
+            ],
+            values=[],
+            id=uid('matrix-checklist'),
         )],
         style={'width': '20%', 'display': 'inline-block', 'vertical-align': 'top'},
     ),
+
+    html.Div(
+        id=uid('matrix-graphs'),
+        style={'width': '80%'},
+    ),
 ])
 
 # ---
 
-import komm
 import numpy as np
 
+cache = LRUCache(max_size=config.RESULT_CACHE_MAX_SIZE, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+metrics.register_cache('walsh_hadamard_sequence', cache)
+
+def packed_matrix(length, ordering):
+    # One bit per entry (set for -1), so that even the 4096 x 4096 matrix takes only 2 MiB in the cache
+    return cache.get(
+        make_key(dict(length=length, ordering=ordering)),
+        lambda: np.packbits(dsp.walsh_hadamard_matrix(length, ordering) < 0, axis=1),
+    )
+
+def polar_row(length, ordering, index):
+    return 1 - 2*np.unpackbits(packed_matrix(length, ordering)[index])[:length].astype(np.int8)
+
+def heatmap(length, ordering):
+    # Matrices larger than HEATMAP_MAX_SIZE are shown averaged over square blocks
+    def compute():
+        matrix = 1 - 2*np.unpackbits(packed_matrix(length, ordering), axis=1)[:, :length].astype(np.int8)
+        factor = max(length // config.HEATMAP_MAX_SIZE, 1)
+        if factor > 1:
+            size = length // factor
+            matrix = np.round(matrix.reshape(size, factor, size, factor).mean(axis=(1, 3)), 2)
+        return {'z': matrix, 'factor': factor}
+    return cache.get(make_key(dict(length=length, ordering=ordering, view='heatmap')), compute)
+
 @app.callback(
     Output(component_id=uid('index-slider'), component_property='max'),
     [Input(component_id=uid('length-slider'), component_property='value')]
@@ -72,7 +114,8 @@ def _(log_length):
     [Input(component_id=uid('length-slider'), component_property='value')]
 )
 def _(log_length):
-    marks = {i: '' for i in range(2**log_length)}
+    # One (unlabeled) mark per index only while they can be told apart
+    marks = {i: '' for i in range(2**log_length)} if log_length <= 7 else {}
     marks[0] = '0'
     marks[2**log_length - 1] = str(2**log_length - 1)
     return marks
@@ -85,14 +128,16 @@ def _(log_length):
 )
 def barker_sequence_update(log_length, ordering, index):
     length = 2**log_length
-    walsh_hadamard = komm.WalshHadamardSequence(length=length, ordering=ordering, index=index)
+    index = min(index, length - 1)  # The index slider may not have been shrunk yet
+    with metrics.phase('simulate'):
+        polar_sequence = polar_row(length, ordering, index)
 
     figure_sequence = dcc.Graph(
         figure=go.Figure(
             data=[
                 go.Scatter(
                     x=np.arange(length + 1),
-                    y=np.pad(walsh_hadamard.polar_sequence, (0, 1), mode='edge'),
+                    y=np.pad(polar_sequence, (0, 1), mode='edge'),
                     mode='lines',
                     line=dict(
                         shape='hv',
@@ -100,7 +145,7 @@ def barker_sequence_update(log_length, ordering, index):
                 ),
             ],
             layout=go.Layout(
-                title=str(walsh_hadamard),
+                title="WalshHadamardSequence(length={}, ordering='{}', index={})".format(length, ordering, index),
                 xaxis=dict(
                     title='n',
                 ),
@@ -116,3 +161,53 @@ def barker_sequence_update(log_length, ordering, index):
     )
 
     return [figure_sequence]
+
+@app.callback(
+    Output(component_id=uid('matrix-graphs'), component_property='children'),
+    [Input(component_id=uid('length-slider'), component_property='value'),
+     Input(component_id=uid('ordering-radio'), component_property='value'),
+     Input(component_id=uid('matrix-checklist'), component_property='values')]
+)
+def walsh_hadamard_matrix_update(log_length, ordering, matrix_checklist):
+    if matrix_checklist != ['Show matrix']:
+        return []
+    length = 2**log_length
+    with metrics.phase('simulate'):
+        output = heatmap(length, ordering)
+    factor = output['factor']
+    title = 'Walsh–Hadamard matrix ({} ordering)'.format(ordering)
+    if factor > 1:
+        title += '<br>averaged over {0} × {0} blocks'.format(factor)
+
+    figure_matrix = dcc.Graph(
+        figure=go.Figure(
+            data=[
+                go.Heatmap(
+                    z=output['z'],
+                    x0=(factor - 1) / 2,
+                    dx=factor,
+                    y0=(factor - 1) / 2,
+                    dy=factor,
+                    zmin=-1,
+                    zmax=1,
+                    colorscale=[[0, 'rgb(0, 0, 0)'], [1, 'rgb(255, 255, 255)']],
+                    showscale=False,
+                ),
+            ],
+            layout=go.Layout(
+                title=title,
+                xaxis=dict(
+                    title='n',
+                ),
+                yaxis=dict(
+                    title='Index',
+                    autorange='reversed',
+                    scaleanchor='x',
+                ),
+            ),
+        ),
+        style={'width': '100%', 'display': 'inline-block'},
+        id=uid('matrix-figure'),
+    )
+
+    return [figure_matrix]
@@ -0,0 +1,407 @@
+import numpy as np
+
+# Same polynomials as komm.LFSRSequence.maximum_length_sequence up to degree 16, extended up to degree 24
+PRIMITIVE_POLYNOMIALS = {
+    1: 0b11,
+    2: 0b111,
+    3: 0b1011,
+    4: 0b10011,
+    5: 0b100101,
+    6: 0b1000011,
+    7: 0b10001001,
+    8: 0b100011101,
+    9: 0b1000010001,
+    10: 0b10000001001,
+    11: 0b100000000101,
+    12: 0b1000001010011,
+    13: 0b10000000011011,
+    14: 0b100010001000011,
+    15: 0b1000000000000011,
+    16: 0b10001000000001011,
+    17: 0b100000000000001001,
+    18: 0b1000000000010000001,
+    19: 0b10000000000000100111,
+    20: 0b100000000000000001001,
+    21: 0b1000000000000000000101,
+    22: 0b10000000000000000000011,
+    23: 0b100000000000000000100001,
+    24: 0b1000000000000000010000111,
+}
+
+
+def lfsr_sequence(feedback_polynomial):
+    """
+    Output bits of the LFSR with the given feedback polynomial and start state 1, the same as komm.LFSRSequence. The bits
+    obey b[n] = XOR of b[n - k] over the taps k, and hence also over the lags k * 2**j (squaring a polynomial over GF(2)
+    squares its indeterminate), which allows computing them in blocks that grow with the sequence.
+    """
+    degree = feedback_polynomial.bit_length() - 1
+    taps = [k for k in range(1, degree + 1) if feedback_polynomial >> k & 1]
+    length = 2**degree - 1
+    bits = np.zeros(length, dtype=np.uint8)
+    bits[degree - 1] = 1
+    n = degree
+    while n < length:
+        scale = 1
+        while 2 * scale * degree <= n:
+            scale *= 2
+        block = min(taps[0] * scale, length - n)
+        bits[n:n + block] = bits[n - taps[0] * scale:n - taps[0] * scale + block]
+        for k in taps[1:]:
+            bits[n:n + block] ^= bits[n - k * scale:n - k * scale + block]
+        n += block
+    return bits
+
+
+def cyclic_autocorrelation(sequence, normalized=False):
+    """
+    Cyclic autocorrelation R[l] for l = 0, ..., L - 1, computed with the FFT in O(L log L).
+    """
+    spectrum = np.fft.rfft(sequence)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), len(sequence))
+    if np.issubdtype(np.asarray(sequence).dtype, np.integer):
+        autocorrelation = np.rint(autocorrelation)
+    if normalized:
+        autocorrelation /= autocorrelation[0]
+    return autocorrelation
+
+
+def _minmax_buckets(y, bucket_size, offset=0):
+    # Positions (plus offset) and values of the minimum and the maximum of each full bucket, in order of position
+    buckets = y.reshape(-1, bucket_size)
+    starts = bucket_size * np.arange(len(buckets))
+    indices = np.sort(np.stack([starts + buckets.argmin(axis=1), starts + buckets.argmax(axis=1)], axis=1), axis=1).ravel()
+    return offset + indices, y[indices]
+
+
+def minmax_decimate(y, max_points, x=None):
+    """
+    Reduces y to at most about `max_points` points by keeping the minimum and the maximum of each of max_points / 2 equal
+    buckets (in order of position), so that peaks survive decimation. Returns (x, y).
+    """
+    y = np.asarray(y)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    num_buckets = max(max_points // 2, 1)
+    if len(y) <= max_points:
+        return x, y
+    bucket_size = -(-len(y) // num_buckets)
+    padding = bucket_size * num_buckets - len(y)
+    indices, _ = _minmax_buckets(np.pad(y.astype(float), (0, padding), mode='edge'), bucket_size)
+    indices = np.minimum(indices, len(y) - 1)
+    return x[indices], y[indices]
+
+
+class MinMaxDecimator:
+    """
+    Streaming version of minmax_decimate, for signals of known length that are produced in chunks.
+    """
+    def __init__(self, length, max_points):
+        self.bucket_size = max(-(-length // max(max_points // 2, 1)), 1)
+        self._carry = np.zeros(0)
+        self._offset = 0
+        self._x = []
+        self._y = []
+
+    def push(self, values):
+        values = np.concatenate([self._carry, values])
+        num_full = len(values) // self.bucket_size * self.bucket_size
+        if num_full:
+            x, y = _minmax_buckets(values[:num_full], self.bucket_size, self._offset)
+            self._x.append(x)
+            self._y.append(y)
+        self._carry = values[num_full:]
+        self._offset += num_full
+
+    def result(self):
+        x, y = list(self._x), list(self._y)
+        if len(self._carry):
+            x_last, y_last = _minmax_buckets(self._carry, len(self._carry), self._offset)
+            x.append(x_last)
+            y.append(y_last)
+        if not x:
+            return np.zeros(0, dtype=int), np.zeros(0)
+        return np.concatenate(x), np.concatenate(y)
+
+
+class OverlapSaveCorrelator:
+    """
+    Streaming cross-correlation c[n] = sum_k x[n + k] t[k] of a real signal with a short real template, computed by FFT
+    overlap-save. Memory use depends only on the FFT size and the chunk size, not on the length of the stream.
+    """
+    def __init__(self, template, fft_size=None):
+        self.template = np.asarray(template, dtype=float)
+        self.fft_size = fft_size or max(1024, 1 << (8*len(self.template) - 1).bit_length())
+        self.hop = self.fft_size - len(self.template) + 1
+        # Correlating with t is convolving with t reversed
+        self._filter = np.fft.rfft(self.template[::-1], self.fft_size)
+        self._buffer = np.zeros(0)
+
+    def process(self, chunk):
+        """
+        Feeds a chunk of the stream, and returns the correlation at every start position that became complete.
+        """
+        buffer = np.concatenate([self._buffer, chunk])
+        if len(buffer) < self.fft_size:
+            self._buffer = buffer
+            return np.zeros(0)
+        num_blocks = (len(buffer) - self.fft_size) // self.hop + 1
+        blocks = np.lib.stride_tricks.as_strided(
+            buffer, shape=(num_blocks, self.fft_size), strides=(self.hop * buffer.strides[0], buffer.strides[0]), writeable=False)
+        convolution = np.fft.irfft(np.fft.rfft(blocks, axis=1) * self._filter, self.fft_size, axis=1)
+        self._buffer = buffer[num_blocks * self.hop:]
+        return convolution[:, len(self.template) - 1:].ravel()
+
+    def flush(self):
+        """
+        Returns the correlation at the remaining start positions (those for which the whole template fits in the stream).
+        """
+        buffer, self._buffer = self._buffer, np.zeros(0)
+        if len(buffer) < len(self.template):
+            return np.zeros(0)
+        return np.correlate(buffer, self.template, mode='valid')
+
+
+class PeakDetector:
+    """
+    Streaming detector of the peaks of a signal above a threshold: within each run of above-threshold samples whose gaps
+    are at most `min_distance`, only the largest sample is reported. Runs may span chunks.
+    """
+    def __init__(self, threshold, min_distance):
+        self.threshold = threshold
+        self.min_distance = min_distance
+        self._offset = 0
+        self._pending = None  # (peak index, peak value, last index) of the run touching the end of the last chunk
+
+    def process(self, values):
+        indices = np.flatnonzero(values >= self.threshold)
+        peaks = []
+        if len(indices):
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(indices) > self.min_distance) + 1])
+            ends = np.concatenate([starts[1:], [len(indices)]])
+            group = np.repeat(np.arange(len(starts)), ends - starts)
+            order = np.lexsort((-values[indices], group))
+            runs = [
+                (self._offset + indices[order[start]], values[indices[order[start]]], self._offset + indices[end - 1])
+                for start, end in zip(starts, ends)
+            ]
+            if self._pending is not None and self._offset + indices[0] - self._pending[2] <= self.min_distance:
+                first = runs[0] if runs[0][1] > self._pending[1] else self._pending
+                runs[0] = (first[0], first[1], runs[0][2])
+                self._pending = None
+            if self._pending is not None:
+                peaks.append(self._pending[:2])
+            peaks += [run[:2] for run in runs[:-1]]
+            self._pending = runs[-1]
+        self._offset += len(values)
+        if self._pending is not None and self._offset - self._pending[2] > self.min_distance:
+            peaks.append(self._pending[:2])
+            self._pending = None
+        return peaks
+
+    def flush(self):
+        peaks = [] if self._pending is None else [self._pending[:2]]
+        self._pending = None
+        return peaks
+
+
+def fwht(a):
+    """
+    In-place fast Walsh-Hadamard transform (natural ordering, unnormalized) along the last axis, whose length must be a
+    power of two. Returns a.
+    """
+    length = a.shape[-1]
+    h = 1
+    while h < length:
+        blocks = a.reshape(a.shape[:-1] + (length // (2*h), 2, h))
+        x = blocks[..., 0, :].copy()
+        blocks[..., 0, :] += blocks[..., 1, :]
+        x -= blocks[..., 1, :]
+        blocks[..., 1, :] = x
+        h *= 2
+    return a
+
+
+def sequency_permutation(length):
+    """
+    Natural-ordering row index of each sequency-ordering row: the bit reversal of the Gray code of the index.
+    """
+    width = (length - 1).bit_length()
+    gray = np.arange(length) ^ (np.arange(length) >> 1)
+    natural = np.zeros(length, dtype=int)
+    for bit in range(width):
+        natural |= (gray >> bit & 1) << (width - 1 - bit)
+    return natural
+
+
+def walsh_hadamard_matrix(length, ordering='natural'):
+    """
+    Walsh-Hadamard matrix with entries in {1, -1}, as in komm.WalshHadamardSequence. Rows are the transforms of unit
+    vectors, so all intermediate values fit in int8.
+    """
+    matrix = fwht(np.eye(length, dtype=np.int8))
+    if ordering == 'sequency':
+        matrix = matrix[sequency_permutation(length)]
+    elif ordering != 'natural':
+        raise ValueError("Parameter 'ordering' must be 'natural' or 'sequency'")
+    return matrix
+
+
+def tap_times(samples_per_symbol, span_in_symbols):
+    """
+    Sampling instants (in symbol periods) of a pulse truncated to `span_in_symbols` symbols, centered on t = 0.
+    """
+    num_taps = span_in_symbols * samples_per_symbol
+    return (np.arange(num_taps) - num_taps // 2) / samples_per_symbol
+
+
+def raised_cosine_taps(rolloff, samples_per_symbol, span_in_symbols):
+    """
+    Taps of the raised cosine pulse (as in komm.RaisedCosinePulse). At t = ±1/(2 rolloff) the formula is 0/0, and its
+    limit, (π/4) sinc(1/(2 rolloff)), is used instead.
+    """
+    t = tap_times(samples_per_symbol, span_in_symbols)
+    numerator = np.sinc(t) * np.cos(np.pi * rolloff * t)
+    denominator = 1 - (2 * rolloff * t)**2
+    singular = np.isclose(denominator, 0.0, atol=1e-9)
+    taps = np.empty_like(t)
+    taps[~singular] = numerator[~singular] / denominator[~singular]
+    taps[singular] = np.pi / 4 * np.sinc(1 / (2 * rolloff))
+    return taps
+
+
+class PolyphaseInterpolator:
+    """
+    Streaming pulse shaping: upsamples symbols by `samples_per_symbol` and filters them with `taps`, computing each of the
+    output phases as a short filter at the symbol rate (a single matrix product per chunk), without ever forming the
+    zero-stuffed signal. Chunks of symbols go in, chunks of samples come out.
+    """
+    def __init__(self, taps, samples_per_symbol):
+        self.samples_per_symbol = samples_per_symbol
+        self.span = -(-len(taps) // samples_per_symbol)
+        # phases[m, p] = taps[m*samples_per_symbol + p], reversed along m to match the order of the symbol windows
+        phases = np.zeros(self.span * samples_per_symbol)
+        phases[:len(taps)] = taps
+        self._phases = phases.reshape(self.span, samples_per_symbol)[::-1].copy()
+        self._history = np.zeros(self.span - 1)
+
+    def process(self, symbols):
+        extended = np.concatenate([self._history, symbols])
+        windows = np.lib.stride_tricks.as_strided(
+            extended, shape=(len(symbols), self.span), strides=(extended.strides[0], extended.strides[0]), writeable=False)
+        self._history = extended[len(extended) - self.span + 1:]
+        return (windows @ self._phases).ravel()
+
+
+class EyeHistogram:
+    """
+    Eye diagram as a 2-D histogram: every sample of a pulse-shaped waveform is counted in the two traces (spanning two
+    symbol periods each, centered on consecutive symbol instants) it belongs to. Fed in chunks; memory is the histogram.
+    """
+    def __init__(self, samples_per_symbol, delay, amplitude_range, amplitude_bins):
+        self.samples_per_symbol = samples_per_symbol
+        self.delay = delay
+        self.amplitude_range = amplitude_range
+        self.amplitude_bins = amplitude_bins
+        self.counts = np.zeros((amplitude_bins, 2 * samples_per_symbol), dtype=np.int64)
+        self._offset = 0
+
+    def push(self, samples):
+        positions = np.arange(self._offset, self._offset + len(samples)) - self.delay
+        self._offset += len(samples)
+        valid = positions >= self.samples_per_symbol  # Skip the filter transient
+        low, high = self.amplitude_range
+        rows = np.floor((samples[valid] - low) / (high - low) * self.amplitude_bins).astype(int)
+        inside = (rows >= 0) & (rows < self.amplitude_bins)
+        rows = rows[inside]
+        columns = positions[valid][inside] % self.samples_per_symbol
+        # Both halves of the traces get the same counts
+        half = np.bincount(rows*self.samples_per_symbol + columns, minlength=self.amplitude_bins*self.samples_per_symbol)
+        half = half.reshape(self.amplitude_bins, self.samples_per_symbol)
+        self.counts[:, :self.samples_per_symbol] += half
+        self.counts[:, self.samples_per_symbol:] += half
+
+
+class WelchEstimator:
+    """
+    Streaming Welch estimate of the power spectral density of a real signal: Hann-windowed segments overlapping by half
+    are averaged incrementally as chunks arrive, so the estimate is available (and improving) at any time, and memory
+    depends only on the segment length.
+    """
+    def __init__(self, segment_length, sample_rate=1.0):
+        self.segment_length = segment_length
+        self.sample_rate = sample_rate
+        self.hop = segment_length // 2
+        self._window = np.hanning(segment_length)
+        self._power_sum = np.zeros(segment_length // 2 + 1)
+        self._carry = np.zeros(0)
+        self.num_segments = 0
+
+    def push(self, samples):
+        samples = np.concatenate([self._carry, samples])
+        if len(samples) < self.segment_length:
+            self._carry = samples
+            return
+        num_segments = (len(samples) - self.segment_length) // self.hop + 1
+        segments = np.lib.stride_tricks.as_strided(
+            samples, shape=(num_segments, self.segment_length), strides=(self.hop * samples.strides[0], samples.strides[0]), writeable=False)
+        self._power_sum += (np.abs(np.fft.rfft(segments * self._window, axis=1))**2).sum(axis=0)
+        self.num_segments += num_segments
+        self._carry = samples[num_segments * self.hop:]
+
+    def psd(self):
+        """
+        Two-sided density, as (frequencies, values) in increasing order of frequency.
+        """
+        frequencies = np.fft.fftshift(np.fft.fftfreq(self.segment_length, 1 / self.sample_rate))
+        power = self._power_sum / max(self.num_segments, 1) / (self.sample_rate * np.sum(self._window**2))
+        return frequencies, np.concatenate([power[:0:-1], power[:-1]])
+
+
+class QuantizationErrorStatistics:
+    """
+    Error statistics (error = output - input) of a bank of scalar quantizers (anything with `levels` and `thresholds`)
+    over a stream of input chunks. Each chunk is sorted once, so that the samples falling in every decision cell of every
+    quantizer are contiguous: a single `searchsorted` of all the thresholds of the bank, together with prefix sums of x
+    and x², then gives the per-cell counts and error moments without quantizing any sample.
+    """
+    def __init__(self, quantizers):
+        sizes = [len(quantizer.levels) for quantizer in quantizers]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        self._levels = np.concatenate([quantizer.levels for quantizer in quantizers])
+        self._lower = np.concatenate([np.concatenate([[-np.inf], quantizer.thresholds]) for quantizer in quantizers])
+        self._upper = np.concatenate([np.concatenate([quantizer.thresholds, [np.inf]]) for quantizer in quantizers])
+        self.num_samples = 0
+        self.signal_energy = 0.0
+        self.error_sum = np.zeros(len(quantizers))
+        self.error_energy = np.zeros(len(quantizers))
+        self.max_abs_error = np.zeros(len(quantizers))
+
+    def push(self, samples):
+        x = np.sort(samples)
+        prefix_1 = np.concatenate([[0.0], np.cumsum(x)])
+        prefix_2 = np.concatenate([[0.0], np.cumsum(x**2)])
+        # Cell k of a quantizer holds the samples with lower <= x < upper, as in komm's ScalarQuantizer
+        low = np.searchsorted(x, self._lower)
+        high = np.searchsorted(x, self._upper)
+        count = high - low
+        sum_1 = prefix_1[high] - prefix_1[low]
+        sum_2 = prefix_2[high] - prefix_2[low]
+        v = self._levels
+        self.error_sum += np.add.reduceat(count*v - sum_1, self._offsets)
+        self.error_energy += np.add.reduceat(sum_2 - 2*v*sum_1 + count*v**2, self._offsets)
+        # The largest error in a cell is at one of its extreme samples
+        nonempty = count > 0
+        extreme = np.zeros(len(v))
+        extreme[nonempty] = np.maximum(np.abs(x[low[nonempty]] - v[nonempty]), np.abs(x[high[nonempty] - 1] - v[nonempty]))
+        self.max_abs_error = np.maximum(self.max_abs_error, np.maximum.reduceat(extreme, self._offsets))
+        self.num_samples += len(x)
+        self.signal_energy += prefix_2[-1]
+
+    def result(self):
+        error_power = self.error_energy / self.num_samples
+        return {
+            'sqnr_db': 10 * np.log10(self.signal_energy / np.maximum(self.error_energy, 1e-300)),
+            'error_mean': self.error_sum / self.num_samples,
+            'error_rms': np.sqrt(np.maximum(error_power, 0.0)),
+            'error_max': self.max_abs_error,
+        }
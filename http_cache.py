@@ -0,0 +1,91 @@
+import hashlib
+import os
+
+import flask
+from flask_compress import Compress
+
+import config
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Dash serves its component bundles as 'application/JavaScript', which Flask-Compress would not match
+COMPRESSIBLE_MIMETYPES = ['text/html', 'text/css', 'application/json', 'application/javascript', 'application/JavaScript']
+
+
+def static_url(filename):
+    with open(os.path.join(STATIC_FOLDER, filename), 'rb') as f:
+        version = hashlib.md5(f.read()).hexdigest()[:8]
+    return '/static/{}?v={}'.format(filename, version)
+
+
+class _CompressedResponses:
+    # Cache backend for Flask-Compress, keyed by ETag. Responses without one (callbacks) are never cached.
+    def __init__(self):
+        self._cache = LRUCache(max_size=256, max_bytes=config.COMPRESSED_CACHE_MAX_BYTES)
+
+    def get(self, key):
+        return None if key is None else self._cache.lookup(key)
+
+    def set(self, key, value):
+        if key is not None:
+            self._cache.put(key, value)
+
+
+def _compressible(response):
+    return (response.status_code == 200
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 'Content-Encoding' not in response.headers
+            and (response.content_length is None or response.content_length >= config.COMPRESS_MIN_SIZE))
+
+
+def install(server):
+    server.config.update(
+        COMPRESS_MIMETYPES=COMPRESSIBLE_MIMETYPES,
+        COMPRESS_LEVEL=config.COMPRESS_LEVEL,
+        COMPRESS_MIN_SIZE=config.COMPRESS_MIN_SIZE,
+        COMPRESS_CACHE_BACKEND=_CompressedResponses,
+        COMPRESS_CACHE_KEY=lambda response: response.headers.get('ETag'),
+    )
+    # After-request hooks run in reverse order of registration: validators first, then brotli, then gzip.
+    Compress(server)
+
+    if brotli is not None:
+        brotli_cache = _CompressedResponses()
+
+        @server.after_request
+        def _(response):
+            if 'br' not in flask.request.headers.get('Accept-Encoding', '') or not _compressible(response):
+                return response
+            response.direct_passthrough = False
+            key = response.headers.get('ETag')
+            data = brotli_cache.get(key)
+            if data is None:
+                data = brotli.compress(response.get_data(), quality=config.COMPRESS_LEVEL)
+                brotli_cache.set(key, data)
+            response.set_data(data)
+            response.headers['Content-Encoding'] = 'br'
+            response.headers['Vary'] = 'Accept-Encoding'
+            return response
+
+    @server.after_request
+    def _(response):
+        request = flask.request
+        if request.method != 'GET' or response.status_code != 200:
+            return response
+        if request.path in ('/_dash-layout', '/_dash-dependencies'):
+            cache_control = 'no-cache'
+        elif request.path.startswith(('/_dash-component-suites/', '/static/')) and 'v' in request.args:
+            cache_control = 'public, max-age={}, immutable'.format(config.STATIC_MAX_AGE)
+        else:
+            return response
+        response.direct_passthrough = False
+        response.add_etag(weak=True)
+        response.headers['Cache-Control'] = cache_control
+        response.headers.pop('Expires', None)
+        return response.make_conditional(request)
@@ -1,14 +1,27 @@
 import importlib
 import json
+import logging
+import threading
+import time
+from urllib.parse import urlparse
 
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output
+import flask
 
-from app import app, server
+import config
+import http_cache
+import metrics
+from app import app, server, uid_prefix
 
+logger = logging.getLogger(__name__)
+
+# The component bundles are served from this server, so that the caching and compression in http_cache.py apply to them.
+# Component stylesheets still come from unpkg: with css serve_locally, dash 0.21 would drop our own /static stylesheet.
+app.scripts.config.serve_locally = True
 app.css.append_css({
-    'external_url': 'https://codepen.io/chriddyp/pen/bWLwgP.css'
+    'external_url': http_cache.static_url('stylesheet.css')
 })
 
 app.title = 'Komm demo'
@@ -19,10 +32,64 @@ with open('app_menu.json') as f:
 menu_layout_div = [html.H2('Menu')]
 
 for app_id, app_dict in app_menu.items():
-    app_dict['dash_layout'] = importlib.import_module('demo.' + app_id).layout
     menu_layout_div.append(html.A(app_dict['menu_name'], href='/' + app_id))
     menu_layout_div.append(html.Br())
 
+# Demo modules (and their callbacks) are imported on first use, so that workers boot fast. Their callbacks only become
+# visible to the threads serving other requests once the whole module is imported (see app.Dash), before its layout is
+# returned.
+_load_lock = threading.Lock()
+
+def load_demo(app_id):
+    app_dict = app_menu[app_id]
+    if 'dash_layout' not in app_dict:
+        with _load_lock:
+            if 'dash_layout' not in app_dict:
+                start = time.perf_counter()
+                with app.registering_callbacks():
+                    layout = importlib.import_module('demo.' + app_id).layout
+                app_dict['load_time'] = time.perf_counter() - start
+                app_dict['dash_layout'] = layout
+                logger.info('Loaded demo %s in %.3f s', app_id, app_dict['load_time'])
+    return app_dict['dash_layout']
+
+def load_report():
+    return {app_id: app_dict.get('load_time') for app_id, app_dict in app_menu.items()}
+
+def _requested_app_ids():
+    request = flask.request
+    if request.path == '/_dash-update-component':
+        body = request.get_json(silent=True) or {}
+        output_id = body.get('output', {}).get('id', '')
+        return [app_id for app_id in app_menu if output_id.startswith(uid_prefix('demo.' + app_id) + '_')]
+    elif request.path == '/_dash-dependencies':
+        # The dependency list is fetched once per page load, so it must include the callbacks of the page being shown.
+        if not request.referrer:
+            return list(app_menu)
+        path = urlparse(request.referrer).path
+    else:
+        path = request.path
+    app_id = path.strip('/')
+    return [app_id] if app_id in app_menu else []
+
+@server.before_request
+def _():
+    for app_id in _requested_app_ids():
+        load_demo(app_id)
+
+@server.route('/_demo-load-report')
+def _():
+    return flask.jsonify(load_report())
+
+metrics.register_gauge(
+    'komm_demo_load_seconds',
+    'Time taken to import a demo module.',
+    lambda: {(('demo', app_id),): load_time for app_id, load_time in load_report().items() if load_time is not None},
+)
+
+for app_id in (list(app_menu) if config.EAGER_DEMOS == ['all'] else config.EAGER_DEMOS):
+    load_demo(app_id)
+
 app.layout = html.Div([
     dcc.Location(id='url', refresh=False),
     html.H1('Komm demo', style={'text-align': 'center', 'padding': '10px', 'background-color': '#EEEEEE'}),
@@ -52,7 +119,7 @@ def display_page(pathname):
             return html.Div([
                 html.H2(app_dict['title']),
                 html.P(['Documentation reference: ', html.A(app_dict['doc'], href=app_dict['doc'])]),
-                app_dict['dash_layout'],
+                load_demo(app_id),
             ])
 
     return '404'
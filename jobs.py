@@ -0,0 +1,382 @@
+import concurrent.futures
+import io
+import json
+import logging
+import os
+import stat
+import threading
+import time
+import uuid
+
+import dash_core_components as dcc
+import dash_html_components as html
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
+import numpy as np
+
+import config
+import metrics
+from cache import LRUCache, digest
+from sessions import SessionStore, session_id
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def num_workers():
+    return config.JOB_WORKERS or os.cpu_count() or 1
+
+def executor():
+    """
+    Process pool shared by all jobs, created on first use (so after gunicorn has forked its workers).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ProcessPoolExecutor(max_workers=num_workers())
+        return _executor
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _dumps(result):
+    # Results are dicts of arrays, lists and scalars, stored as .npz: unlike pickles, loading one never runs code
+    buffer = io.BytesIO()
+    np.savez(buffer, **{key: np.asarray(value) for key, value in result.items()})
+    return buffer.getvalue()
+
+
+def _loads(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        return {key: arrays[key].item() if arrays[key].ndim == 0 else arrays[key] for key in arrays.files}
+
+
+def _write(path, data):
+    # Written aside and renamed, so that readers in other workers never see a partial file
+    temporary_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    with open(temporary_path, 'wb') as f:
+        f.write(data)
+    os.replace(temporary_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _write_status(path, state, progress, error=None):
+    status = {'state': state, 'progress': progress, 'error': error, 'updated': time.time()}
+    _write(path, json.dumps(status).encode())
+
+
+def _make_private_directory(directory):
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError('Job directory {} must be a directory owned by the current user, with mode 0700'.format(directory))
+
+
+class Progress:
+    """
+    The `progress(fraction, partial=None)` callback given to a job, which records how far it has got, optionally along
+    with a partial result (see `JobQueue.partial_result`), and raises `Cancelled` once the job has been cancelled (see
+    `JobQueue.cancel`) or nobody has asked about it for `idle_timeout` seconds. It only deals with files of the job
+    directory, so that it works (and can be pickled) for computations run in the process pool as well.
+    """
+    def __init__(self, directory, job_id, idle_timeout):
+        self.directory = directory
+        self.job_id = job_id
+        self.idle_timeout = idle_timeout
+
+    def _path(self, extension):
+        return os.path.join(self.directory, '{}.{}'.format(self.job_id, extension))
+
+    def idle(self):
+        try:
+            return time.time() - os.path.getmtime(self._path('polled')) > self.idle_timeout
+        except FileNotFoundError:
+            return True
+
+    def __call__(self, fraction, partial=None):
+        if self.idle() or os.path.exists(self._path('cancelled')):
+            raise Cancelled()
+        if partial is not None:
+            _write(self._path('partial.npz'), _dumps(partial))
+        _write_status(self._path('status'), 'running', fraction)
+
+
+class JobQueue:
+    """
+    Long-running computations, run in background threads instead of in the callback that asks for them; at most
+    `max_running` at a time, the others wait queued. The threads either do the work themselves, handing its heavy
+    parts to `executor()` (as ber.error_rate_curve does), or send the whole computation to `executor()`. A job is
+    identified by the digest of its key, so identical submissions share a single run. Progress and results are kept as
+    files in `directory` (which must be private to the user running the app, as checked on creation): any worker can
+    report on a job started by another, results outlive worker restarts, and a job whose lock has not been refreshed
+    for `stale_after` seconds (its worker died) is taken over by the next submission. Jobs nobody has asked about
+    (through `submit` or `status`) for `idle_timeout` seconds are cancelled, so that pages left or parameters dragged
+    past do not keep the worker busy.
+    """
+    def __init__(self, directory, max_running=2, stale_after=30, idle_timeout=15, max_results=256):
+        _make_private_directory(directory)
+        self.directory = directory
+        self.stale_after = stale_after
+        self.idle_timeout = idle_timeout
+        self.max_results = max_results
+        self._runners = concurrent.futures.ThreadPoolExecutor(max_workers=max_running)
+        self._running = set()
+        self._lock = threading.Lock()
+        self.results = LRUCache(max_size=config.RESULT_CACHE_MAX_SIZE, max_bytes=config.RESULT_CACHE_MAX_BYTES)
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.directory, '{}.{}'.format(job_id, extension))
+
+    def submit(self, key, compute, pooled=False, inline=False):
+        """
+        Starts `compute(progress=progress)` unless an identical job is done, queued or running; returns the job id
+        either way. The computation may call `progress(fraction, partial=None)`, see `Progress`. If `pooled`, it runs in
+        `executor()`, so it must be picklable (e.g. a functools.partial of a module-level function). If `inline`, it
+        runs right away in the calling thread instead, and is done when this returns: meant for computations too short
+        to be worth a round of polling.
+        """
+        job_id = digest(key)
+        with self._lock:
+            self._touch(job_id)
+            _remove(self._path(job_id, 'cancelled'))
+            if job_id in self._running or os.path.exists(self._path(job_id, 'npz')):
+                return job_id
+            token = self._acquire(job_id)
+            if token is None:
+                return job_id
+            self._running.add(job_id)
+        _write_status(self._path(job_id, 'status'), 'queued', 0.0)
+        if inline:
+            self._run(job_id, token, compute, False, threading.Event())
+            return job_id
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, token, done), daemon=True).start()
+        self._runners.submit(self._run, job_id, token, compute, pooled, done)
+        return job_id
+
+    def cancel(self, job_id):
+        """
+        Stops the job at its next progress report (or before it starts, if it is queued), unless it is submitted again
+        in the meantime.
+        """
+        with open(self._path(job_id, 'cancelled'), 'a'):
+            pass
+
+    def _touch(self, job_id):
+        # Marks the job as still wanted
+        with open(self._path(job_id, 'polled'), 'a'):
+            pass
+        os.utime(self._path(job_id, 'polled'))
+
+    def _acquire(self, job_id):
+        # The lock holds a token unique to this run, so that a run only ever refreshes or releases its own lock (and
+        # not the one of a run that took over after it was considered abandoned). Returns the token, or None.
+        path = self._path(job_id, 'lock')
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._stale(path):
+                    return None
+                self._release(job_id, self._lock_token(job_id))
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(token)
+            return token
+        return None
+
+    def _lock_token(self, job_id):
+        try:
+            with open(self._path(job_id, 'lock')) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _release(self, job_id, token):
+        if token is not None and self._lock_token(job_id) == token:
+            _remove(self._path(job_id, 'lock'))
+
+    def _stale(self, lock_path):
+        try:
+            return time.time() - os.path.getmtime(lock_path) > self.stale_after
+        except FileNotFoundError:
+            return True
+
+    def _heartbeat(self, job_id, token, done):
+        while not done.wait(self.stale_after / 3):
+            if self._lock_token(job_id) != token:
+                return
+            try:
+                os.utime(self._path(job_id, 'lock'))
+            except FileNotFoundError:
+                return
+
+    def _run(self, job_id, token, compute, pooled, done):
+        progress = Progress(self.directory, job_id, self.idle_timeout)
+        try:
+            progress(0.0)
+            if pooled:
+                result = executor().submit(compute, progress=progress).result()
+            else:
+                result = compute(progress=progress)
+            _write(self._path(job_id, 'npz'), _dumps(result))
+            self.results.put(job_id, result)
+            _write_status(self._path(job_id, 'status'), 'done', 1.0)
+            self._prune()
+        except Cancelled:
+            _write_status(self._path(job_id, 'status'), 'cancelled', None)
+        except Exception as error:
+            logger.exception('Job %s failed', job_id)
+            _write_status(self._path(job_id, 'status'), 'failed', None, error=repr(error))
+        finally:
+            done.set()
+            _remove(self._path(job_id, 'partial.npz'))
+            _remove(self._path(job_id, 'cancelled'))
+            self._release(job_id, token)
+            with self._lock:
+                self._running.discard(job_id)
+
+    def status(self, job_id):
+        """
+        Dict with the 'state' of the job ('queued', 'running', 'done', 'failed', 'cancelled', 'abandoned' or
+        'unknown'), its 'progress' (a fraction, or None) and, for failed jobs, the 'error'.
+        """
+        if os.path.exists(self._path(job_id, 'npz')):
+            return {'state': 'done', 'progress': 1.0, 'error': None}
+        try:
+            with open(self._path(job_id, 'status')) as f:
+                status = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'state': 'unknown', 'progress': None, 'error': None}
+        if status['state'] in ('queued', 'running'):
+            if self._stale(self._path(job_id, 'lock')):
+                status['state'] = 'abandoned'
+            else:
+                self._touch(job_id)
+        return {key: status[key] for key in ['state', 'progress', 'error']}
+
+    def result(self, job_id):
+        return self.results.get(job_id, lambda: _loads(self._path(job_id, 'npz')))
+
+    def partial_result(self, job_id):
+        """
+        The latest partial result reported by a running job, or None.
+        """
+        try:
+            return _loads(self._path(job_id, 'partial.npz'))
+        except FileNotFoundError:
+            return None
+
+    def _prune(self):
+        # Only the most recent results are kept on disk
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.npz') and not name.endswith('.partial.npz')]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.max_results:]:
+            for extension in ['npz', 'status', 'polled']:
+                _remove(path[:-len('npz')] + extension)
+
+
+queue = JobQueue(
+    directory=config.JOB_DIR,
+    max_running=config.JOB_MAX_RUNNING,
+    stale_after=config.JOB_STALE_AFTER,
+    idle_timeout=config.JOB_IDLE_TIMEOUT,
+    max_results=config.JOB_MAX_RESULTS,
+)
+metrics.register_cache('jobs', queue.results)
+
+
+def status_message(status, restart_action):
+    """
+    What a page shows about a job that is not done, given its `status()`. The `restart_action` is what starts it again
+    if it has been interrupted (e.g. 'change a parameter').
+    """
+    if status['state'] == 'queued':
+        return 'Waiting for other simulations to finish...'
+    elif status['state'] == 'running':
+        return 'Simulating ({:.0%} done)...'.format(status['progress'] or 0.0)
+    elif status['state'] == 'failed':
+        return 'Simulation failed: {}'.format(status['error'])
+    return 'Simulation interrupted; {} to start it again.'.format(restart_action)
+
+
+views = []  # Every JobView created so far
+
+
+class JobView:
+    """
+    Page side of a job: `layout` holds a paragraph showing the status of the job, a hidden div holding its id, and an
+    interval polling it while it is queued or running (their ids are `uid(name)` plus a suffix). The callback of
+    `inputs` and `states` is the only one that starts jobs: it returns `submit(*values)`, the id of the job (or None).
+    The children of `output_id` are built by the function decorated with `render`, from the result of the job once it
+    is done, or from its latest partial result while it runs; until then the previous children stay on screen. A job
+    superseded by a new submission from the same session is cancelled, so that dragging a slider does not queue the
+    wanted job behind those of the values dragged past.
+    """
+    def __init__(self, app, uid, name, output_id, inputs, submit, states=(), restart_action='change a parameter'):
+        self.id = uid(name)
+        views.append(self)
+        self._render = None
+        self._last_job_ids = SessionStore(factory=dict)
+        self.layout = [
+            html.P(
+                id=uid(name + '-status'),
+            ),
+            html.Div(
+                id=uid(name),
+                style={'display': 'none'},
+            ),
+            dcc.Interval(
+                id=uid(name + '-interval'),
+                interval=config.JOB_POLL_INTERVAL,
+                n_intervals=0,
+                disabled=True,
+            ),
+        ]
+        polled = [Input(component_id=uid(name), component_property='children'),
+                  Input(component_id=uid(name + '-interval'), component_property='n_intervals')]
+
+        @app.callback(Output(component_id=uid(name), component_property='children'), inputs, list(states))
+        def _(*values):
+            job_id = submit(*values)
+            last = self._last_job_ids.get(session_id())
+            if last.get('job_id') not in (None, job_id):
+                queue.cancel(last['job_id'])
+            last['job_id'] = job_id
+            return job_id
+
+        @app.callback(Output(component_id=output_id, component_property='children'), polled)
+        def _(job_id, n_intervals):
+            if not job_id:
+                return []
+            with metrics.phase('simulate'):
+                if queue.status(job_id)['state'] == 'done':
+                    output = queue.result(job_id)
+                else:
+                    output = queue.partial_result(job_id)
+            if output is None:
+                raise PreventUpdate()
+            return self._render(output)
+
+        @app.callback(Output(component_id=uid(name + '-status'), component_property='children'), polled)
+        def _(job_id, n_intervals):
+            status = queue.status(job_id) if job_id else {'state': 'done'}
+            return '' if status['state'] == 'done' else status_message(status, restart_action)
+
+        @app.callback(Output(component_id=uid(name + '-interval'), component_property='disabled'), polled)
+        def _(job_id, n_intervals):
+            return not job_id or queue.status(job_id)['state'] not in ('queued', 'running')
+
+    def render(self, function):
+        self._render = function
+        return function
@@ -0,0 +1,167 @@
+import bisect
+import contextlib
+import functools
+import threading
+import time
+
+import flask
+
+import config
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+SIZE_BUCKETS = [4**i for i in range(4, 13)]  # 256 B to 16 MiB
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram, with one series per set of label values.
+    """
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            counts, total = self._series.get(label_values, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._series[label_values] = (counts, total + value)
+
+    def expose(self):
+        lines = ['# HELP {} {}'.format(self.name, self.documentation), '# TYPE {} histogram'.format(self.name)]
+        with self._lock:
+            series = sorted((label_values, list(counts), total) for label_values, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            labels = _labels(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ['+Inf'], counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(self.name, _labels(zip(self.label_names + ('le',), label_values + (str(bound),))), cumulative))
+            lines.append('{}_sum{} {}'.format(self.name, labels, total))
+            lines.append('{}_count{} {}'.format(self.name, labels, cumulative))
+        return lines
+
+
+def _labels(pairs):
+    escaped = ('{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')) for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+callback_seconds = Histogram(
+    'komm_demo_callback_seconds', 'Time spent in a Dash callback, serialization included.', ('callback',), LATENCY_BUCKETS)
+callback_phase_seconds = Histogram(
+    'komm_demo_callback_phase_seconds', 'Time spent in a Dash callback, split into simulate, figure and serialize phases.', ('callback', 'phase'), LATENCY_BUCKETS)
+callback_input_bytes = Histogram(
+    'komm_demo_callback_input_bytes', 'Size of the request body of a Dash callback.', ('callback',), SIZE_BUCKETS)
+callback_output_bytes = Histogram(
+    'komm_demo_callback_output_bytes', 'Size of the (uncompressed) response body of a Dash callback.', ('callback',), SIZE_BUCKETS)
+
+_caches = {}
+_gauges = {}
+_phases = threading.local()
+
+
+def register_cache(name, cache):
+    _caches[name] = cache
+
+
+def register_gauge(name, documentation, collect):
+    # `collect` returns a dict mapping label sets (tuples of (name, value) pairs) to values
+    _gauges[name] = (documentation, collect)
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Accounts the enclosed time to phase `name` of the callback being run by this thread (usable as a decorator too).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = getattr(_phases, 'current', None)
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def _timed(func):
+    # Wraps the user function, so that its time can be told apart from the serialization done by Dash
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _phases.current['callback'] = time.perf_counter() - start
+    return timed
+
+
+def _measured(callback_id, add_context):
+    @functools.wraps(add_context)
+    def measured(*args, **kwargs):
+        _phases.current = {}
+        start = time.perf_counter()
+        try:
+            response = add_context(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            phases = _phases.current
+        finally:
+            _phases.current = None
+        simulate = phases.get('simulate', 0.0)
+        callback = phases.get('callback', 0.0)
+        callback_seconds.observe((callback_id,), elapsed)
+        callback_phase_seconds.observe((callback_id, 'simulate'), simulate)
+        callback_phase_seconds.observe((callback_id, 'figure'), max(callback - simulate, 0.0))
+        callback_phase_seconds.observe((callback_id, 'serialize'), max(elapsed - callback, 0.0))
+        if flask.has_request_context():
+            callback_input_bytes.observe((callback_id,), len(flask.request.get_data()))
+        callback_output_bytes.observe((callback_id,), response.content_length or 0)
+        return response
+    return measured
+
+
+def install(app):
+    if not config.METRICS_ENABLED:
+        return
+
+    register_callback = app.callback
+
+    def callback(output, inputs=[], state=[], events=[]):
+        callback_id = '{}.{}'.format(output.component_id, output.component_property)
+        wrap_func = register_callback(output, inputs, state, events)
+
+        def wrap(func):
+            measured = _measured(callback_id, wrap_func(_timed(func)))
+            app.callback_map[callback_id]['callback'] = measured
+            return measured
+
+        return wrap
+
+    app.callback = callback
+
+    @app.server.route('/metrics')
+    def _metrics():
+        return flask.Response('\n'.join(expose()) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def expose():
+    lines = []
+    for histogram in [callback_seconds, callback_phase_seconds, callback_input_bytes, callback_output_bytes]:
+        lines += histogram.expose()
+    stats = {name: cache.stats() for name, cache in sorted(_caches.items())}
+    for key, metric_type, documentation in [
+        ('size', 'gauge', 'Number of entries in a result cache.'),
+        ('bytes', 'gauge', 'Approximate memory held by a result cache.'),
+        ('hits', 'counter', 'Result cache hits.'),
+        ('misses', 'counter', 'Result cache misses.'),
+    ]:
+        name = 'komm_demo_cache_{}{}'.format(key, '_total' if metric_type == 'counter' else '')
+        lines += ['# HELP {} {}'.format(name, documentation), '# TYPE {} {}'.format(name, metric_type)]
+        lines += ['{}{} {}'.format(name, _labels([('cache', cache_name)]), cache_stats[key]) for cache_name, cache_stats in stats.items()]
+    for name, (documentation, collect) in sorted(_gauges.items()):
+        lines += ['# HELP {} {}'.format(name, documentation), '# TYPE {} gauge'.format(name)]
+        lines += ['{}{} {}'.format(name, _labels(labels), value) for labels, value in sorted(collect().items())]
+    return lines
@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+
+import config
+
+
+class GaussianReservoir:
+    """
+    Pool of pre-generated standard complex Gaussian samples (unit variance, circularly symmetric). Callers get read-only
+    views of it, so no random numbers are drawn on the request path. After every `refresh_every` views, a new pool is
+    generated in a background thread and swapped in; views already handed out keep referencing the old one, so callers
+    that keep samples for long (in a cache, say) should copy them rather than pin a whole pool.
+    """
+    def __init__(self, size, seed=None, refresh_every=256):
+        self.size = size
+        self.refresh_every = refresh_every
+        self._random_state = np.random.RandomState(seed)
+        self._lock = threading.Lock()
+        self._samples = self._generate()
+        self._num_takes = 0
+        self._refreshing = False
+
+    def _generate(self):
+        samples = self._random_state.standard_normal(2*self.size).view(np.complex128)
+        samples *= np.sqrt(0.5)
+        samples.flags.writeable = False
+        return samples
+
+    def _refresh(self):
+        samples = self._generate()
+        with self._lock:
+            self._samples = samples
+            self._refreshing = False
+
+    def take(self, size):
+        if size > self.size:
+            raise ValueError("Requested {} samples from a reservoir of size {}".format(size, self.size))
+        offset = self._random_state.randint(self.size - size + 1)
+        with self._lock:
+            samples = self._samples
+            self._num_takes += 1
+            if self._num_takes % self.refresh_every == 0 and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, daemon=True).start()
+        return samples[offset : offset + size]
+
+
+reservoir = GaussianReservoir(
+    size=config.NOISE_RESERVOIR_SIZE,
+    seed=config.NOISE_RESERVOIR_SEED,
+    refresh_every=config.NOISE_RESERVOIR_REFRESH_EVERY,
+)
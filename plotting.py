@@ -0,0 +1,87 @@
+import numpy as np
+import plotly.graph_objs as go
+
+import config
+
+
+def compact(values, scale, digits=config.CLOUD_DIGITS):
+    # Rounded floats serialize to short JSON numbers (e.g. '0.123' instead of '0.12345678901234566'). The rounding
+    # step follows `scale` (the spread of the values), so that it stays invisible however small the spread is.
+    decimals = digits - int(np.floor(np.log10(scale)))
+    return np.round(values, max(decimals, 0))
+
+
+def cloud_trace(**kwargs):
+    trace_type = go.Scattergl if config.WEBGL_CLOUDS else go.Scatter
+    return trace_type(mode='markers', **kwargs)
+
+
+def segments_trace_data(segments):
+    # Line segments as a single trace, with gaps (None) between them
+    x, y = [], []
+    for (x0, y0), (x1, y1) in segments:
+        x += [x0, x1, None]
+        y += [y0, y1, None]
+    return {'x': x, 'y': y}
+
+
+def set_title(figure, title, parameters_label):
+    # The parameter values are shown in the title, so that slider moves need no separate label callbacks
+    figure['layout']['title'] = '{}<br>{}'.format(title, parameters_label)
+
+
+def update_trace(trace, uid, **data):
+    # Traces are tagged with the digest of the parameters they were computed from, so unchanged traces are left alone
+    if trace.get('uid') != uid:
+        trace.update(uid=uid, **data)
+
+
+def error_rate_figure(output):
+    # Simulated rates (with 95% confidence intervals) as markers, theoretical ones as lines, see ber.error_rate_curve.
+    # Points stopped by the symbol cap before converging are drawn open, and points without any error are drawn as
+    # their 95% upper bound (a down-pointing triangle) instead of a rate of zero. The theoretical BER assumes Gray
+    # labeling, so it is left out for other labelings.
+    capped, zero_errors = output['capped'], output['zero_errors']
+    symbols = np.where(zero_errors, 'triangle-down-open', np.where(capped, 'circle-open', 'circle'))
+    text = [
+        '{:,} symbols{}'.format(n, ' (no errors, upper bound)' if zero else ' (capped)' if cap else '')
+        for n, cap, zero in zip(output['num_symbols'], capped, zero_errors)
+    ]
+    data = []
+    for name, color in [('SER', 'red'), ('BER', 'blue')]:
+        low, high = output[name.lower() + '_interval']
+        rate = np.where(zero_errors, high, output[name.lower()])
+        data.append(go.Scatter(
+            name='{} (simulation)'.format(name),
+            x=output['ebno_db'],
+            y=rate,
+            error_y={'type': 'data', 'symmetric': False, 'array': high - rate, 'arrayminus': np.where(zero_errors, 0, rate - low)},
+            text=text,
+            mode='markers',
+            marker={'color': color, 'symbol': symbols, 'size': 8},
+        ))
+        if name == 'BER' and not output['gray_labeling']:
+            continue
+        data.append(go.Scatter(
+            name='{} (theory)'.format(name),
+            x=output['theory_ebno_db'],
+            y=output['theory_' + name.lower()],
+            mode='lines',
+            line={'color': color, 'dash': 'dash' if name == 'BER' else 'solid', 'width': 1},
+        ))
+    return go.Figure(
+        data=data,
+        layout=go.Layout(
+            title='{}<br>Monte Carlo over {} processes in {:.1f} s'.format(output['title'], output['workers'], output['elapsed']),
+            xaxis=dict(
+                title='Eb/N0 (dB)',
+            ),
+            yaxis=dict(
+                title='Error rate',
+                type='log',
+                range=[-7, 0],
+                exponentformat='power',
+            ),
+            hovermode='closest',
+        ),
+    )
@@ -0,0 +1,62 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import time
+
+import flask
+
+import config
+
+HEADER_NAME = 'X-Komm-Demo-Profile'
+QUERY_PARAMETER = 'profile'
+
+logger = logging.getLogger(__name__)
+
+
+def _requested():
+    token = flask.request.headers.get(HEADER_NAME) or flask.request.args.get(QUERY_PARAMETER)
+    return token is not None and hmac.compare_digest(token.encode(), config.PROFILE_TOKEN.encode())
+
+
+def _dump(profiler, output_id):
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    name = '{}-{}-{}'.format(time.strftime('%Y%m%d-%H%M%S'), os.getpid(), re.sub(r'[^\w.-]', '_', output_id) or 'request')
+    path = os.path.join(config.PROFILE_DIR, name)
+    # The .prof file can be loaded by pstats, snakeviz or flameprof; the .txt file is readable as is
+    profiler.dump_stats(path + '.prof')
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(config.PROFILE_MAX_LINES)
+    with open(path + '.txt', 'w') as f:
+        f.write(text.getvalue())
+    return name
+
+
+def install(server):
+    """
+    Runs a `_dash-update-component` request under cProfile when it carries the configured token, either in the
+    X-Komm-Demo-Profile header or in the `profile` query parameter. Disabled unless KOMM_DEMO_PROFILE_TOKEN is set.
+    """
+    if not config.PROFILE_TOKEN:
+        return
+
+    @server.before_request
+    def _():
+        if flask.request.path == '/_dash-update-component' and _requested():
+            flask.g.profiler = cProfile.Profile()
+            flask.g.profiler.enable()
+
+    @server.after_request
+    def _(response):
+        profiler = flask.g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            body = flask.request.get_json(silent=True) or {}
+            output = body.get('output', {})
+            name = _dump(profiler, '{}.{}'.format(output.get('id', ''), output.get('property', '')))
+            logger.info('Wrote profile %s', name)
+            response.headers[HEADER_NAME] = name
+        return response
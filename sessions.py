@@ -0,0 +1,106 @@
+import collections
+import threading
+import time
+import uuid
+
+import flask
+
+import config
+from cache import sizeof
+
+COOKIE_NAME = 'komm_demo_session'
+
+
+def session_id():
+    try:
+        return flask.request.cookies.get(COOKIE_NAME)
+    except RuntimeError:  # Outside of a request context
+        return None
+
+
+def install(server):
+    @server.after_request
+    def _(response):
+        # Only pages and callbacks carry the cookie: bundles and static files are cached publicly (see http_cache.py),
+        # and a shared cache must never store a per-user cookie along with them
+        if flask.request.path != '/_dash-update-component' and response.mimetype != 'text/html':
+            return response
+        if COOKIE_NAME not in flask.request.cookies:
+            response.set_cookie(COOKIE_NAME, uuid.uuid4().hex, httponly=True, samesite='Lax')
+        return response
+
+
+class SessionStore:
+    """
+    Per-session state objects, created on demand by `factory`. Sessions idle for more than `ttl` seconds are evicted,
+    and so are the least recently used ones beyond `max_size` sessions or `max_bytes` (approximate) bytes, which bounds
+    the memory used by the store. A state is measured (see cache.sizeof) when created and again whenever its session
+    comes back, so the bytes reflect every state as left by its previous request; arrays a state shares with a result
+    cache are charged to it as well.
+    """
+    def __init__(self, factory, ttl=config.SESSION_TTL, max_size=config.SESSION_STORE_MAX_SIZE, max_bytes=config.SESSION_STORE_MAX_BYTES):
+        self._factory = factory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._states = collections.OrderedDict()
+        self._num_bytes = 0
+        self._creating = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    def get(self, session_id):
+        if session_id is None:
+            return self._factory()
+        with self._lock:
+            state = self._touch(session_id)
+            if state is not None:
+                return state
+            creating = self._creating.setdefault(session_id, threading.Lock())
+        # Concurrent requests of a new session (several inputs fire together on page load) wait for a single state
+        with creating:
+            with self._lock:
+                state = self._touch(session_id)
+            if state is None:
+                state = self._factory()
+                size = sizeof(state)
+                with self._lock:
+                    self._states[session_id] = (state, time.monotonic(), size)
+                    self._num_bytes += size
+                    self._shrink()
+            with self._lock:
+                self._creating.pop(session_id, None)
+        return state
+
+    def _touch(self, session_id):
+        # The state of the session (moved to the most recently used end, and measured again), or None; called with the
+        # lock held
+        now = time.monotonic()
+        self._evict(now)
+        if session_id not in self._states:
+            return None
+        state, _, size = self._states[session_id]
+        self._states.move_to_end(session_id)
+        new_size = sizeof(state)
+        self._states[session_id] = (state, now, new_size)
+        self._num_bytes += new_size - size
+        self._shrink()
+        return state
+
+    def _pop_oldest(self):
+        _, (_, _, size) = self._states.popitem(last=False)
+        self._num_bytes -= size
+
+    def _shrink(self):
+        # The most recently used session is kept, even if alone over `max_bytes`
+        while len(self._states) > self.max_size or (len(self._states) > 1 and self._num_bytes > self.max_bytes):
+            self._pop_oldest()
+
+    def _evict(self, now):
+        while self._states:
+            _, last_access, _ = next(iter(self._states.values()))
+            if now - last_access <= self.ttl:
+                break
+            self._pop_oldest()
@@ -0,0 +1,88 @@
+import numpy as np
+
+DECIMALS = 9
+
+
+class Slicer:
+    """
+    Hard-decision detector for a constellation (optionally rotated by `rotation` radians). When the de-rotated points
+    form a full rectangular grid, as those of QAModulation do, decisions are made per axis by rounding and clipping,
+    in time linear in the number of samples; otherwise the nearest point is searched for, in blocks.
+    """
+    def __init__(self, constellation, rotation=0.0):
+        self.constellation = np.asarray(constellation, dtype=complex)
+        self.rotation = rotation
+        self._grid = self._detect_grid(self.constellation * np.exp(-1j * rotation))
+
+    @staticmethod
+    def _detect_grid(points):
+        axes = []
+        for values in [np.real(points), np.imag(points)]:
+            ticks = np.unique(np.round(values, DECIMALS))
+            steps = np.diff(ticks)
+            if len(ticks) > 1 and not np.allclose(steps, steps[0]):
+                return None
+            axes.append((ticks[0], steps[0] if len(ticks) > 1 else 1.0, len(ticks)))
+        (x0, dx, nx), (y0, dy, ny) = axes
+        if nx * ny != len(points):
+            return None
+        ix = np.round((np.real(points) - x0) / dx).astype(int)
+        iy = np.round((np.imag(points) - y0) / dy).astype(int)
+        point_at = np.full((ny, nx), -1, dtype=np.intp)
+        point_at[iy, ix] = np.arange(len(points))
+        if np.any(point_at < 0):
+            return None
+        return {'x0': x0, 'dx': dx, 'nx': nx, 'y0': y0, 'dy': dy, 'ny': ny, 'point_at': point_at}
+
+    @property
+    def separable(self):
+        return self._grid is not None
+
+    def __call__(self, received):
+        """
+        Indices (into the constellation) of the decided points.
+        """
+        received = np.asarray(received)
+        if self._grid is None:
+            return self._nearest(received)
+        grid = self._grid
+        if self.rotation:
+            received = received * np.exp(-1j * self.rotation)
+        ix = np.clip(np.rint((received.real - grid['x0']) / grid['dx']), 0, grid['nx'] - 1).astype(np.intp)
+        iy = np.clip(np.rint((received.imag - grid['y0']) / grid['dy']), 0, grid['ny'] - 1).astype(np.intp)
+        return grid['point_at'][iy, ix]
+
+    def _nearest(self, received):
+        decided = np.empty(len(received), dtype=np.intp)
+        step = max(2**20 // len(self.constellation), 1)
+        for start in range(0, len(received), step):
+            block = received[start : start + step, np.newaxis]
+            distances = (block.real - self.constellation.real)**2 + (block.imag - self.constellation.imag)**2
+            decided[start : start + step] = np.argmin(distances, axis=1)
+        return decided
+
+    def boundaries(self):
+        """
+        Decision-region boundaries as a list of segments ((x0, y0), (x1, y1)): the grid lines halfway between rows and
+        columns for grids, or the rays halfway between points for equal-energy, equally spaced (PSK) constellations.
+        Empty for anything else.
+        """
+        if self._grid is not None:
+            grid = self._grid
+            x_low, x_high = grid['x0'] - grid['dx'] / 2, grid['x0'] + (grid['nx'] - 0.5) * grid['dx']
+            y_low, y_high = grid['y0'] - grid['dy'] / 2, grid['y0'] + (grid['ny'] - 0.5) * grid['dy']
+            segments = [((x, y_low), (x, y_high)) for x in grid['x0'] + (np.arange(1, grid['nx']) - 0.5) * grid['dx']]
+            segments += [((x_low, y), (x_high, y)) for y in grid['y0'] + (np.arange(1, grid['ny']) - 0.5) * grid['dy']]
+            rotation = np.exp(1j * self.rotation)
+            return [tuple(_xy(complex(*end) * rotation) for end in segment) for segment in segments]
+        radii = np.abs(self.constellation)
+        angles = np.sort(np.angle(self.constellation) % (2*np.pi))
+        order = len(self.constellation)
+        if order > 1 and np.allclose(radii, radii[0]) and np.allclose(np.diff(angles), 2*np.pi / order):
+            reach = 1.25 * radii[0]
+            return [((0.0, 0.0), _xy(reach * np.exp(1j * (angle + np.pi / order)))) for angle in angles]
+        return []
+
+
+def _xy(z):
+    return (float(np.real(z)), float(np.imag(z)))
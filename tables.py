@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+
+DECIMALS = 6
+
+
+class ResponseTable:
+    """
+    Evaluations of `evaluate(value)` (a dict of equally shaped arrays) for every step of a slider, stored as float32 and
+    shared across requests. Rows are filled on first use, or all at once by `fill`.
+    """
+    def __init__(self, evaluate, minimum, maximum, step):
+        self._evaluate = evaluate
+        self.minimum = minimum
+        self.step = step
+        self.num_steps = int(round((maximum - minimum) / step)) + 1
+        self._rows = None
+        self._filled = np.zeros(self.num_steps, dtype=bool)
+        self._lock = threading.Lock()
+
+    def value(self, index):
+        return round(self.minimum + index*self.step, 12)
+
+    def index(self, value):
+        index = int(round((value - self.minimum) / self.step))
+        if not 0 <= index < self.num_steps:
+            raise ValueError('Value {} is out of the range of the table'.format(value))
+        return index
+
+    def __getitem__(self, value):
+        index = self.index(value)
+        if not self._filled[index]:
+            row = self._evaluate(self.value(index))
+            with self._lock:
+                if self._rows is None:
+                    self._rows = {key: np.zeros((self.num_steps,) + np.shape(array), dtype=np.float32) for key, array in row.items()}
+                for key, array in row.items():
+                    self._rows[key][index] = array
+                self._filled[index] = True
+        # Back to (rounded) float64, so that values serialize to short JSON numbers instead of float32 noise digits
+        return {key: np.round(rows[index].astype(float), DECIMALS) for key, rows in self._rows.items()}
+
+    def fill(self):
+        for index in range(self.num_steps):
+            self[self.value(index)]
+
+    @property
+    def nbytes(self):
+        return 0 if self._rows is None else sum(rows.nbytes for rows in self._rows.values())
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['KOMM_DEMO_JOB_DIR'] = tempfile.mkdtemp(prefix='komm-demo-test-jobs-')
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import ber
+import config
+
+PSK = dict(order=8, amplitude=1.0, phase_offset=0.0, labeling='reflected')
+QAM = dict(orders=16, base_amplitudes=1.0, phase_offset=0.0, labeling='reflected_2d')
+
+
+@pytest.mark.parametrize('kind, arguments, gray', [
+    ('psk', PSK, True),
+    ('psk', dict(PSK, labeling='natural'), False),
+    ('psk', dict(PSK, order=2, labeling='natural'), True),
+    ('qam', QAM, True),
+    ('qam', dict(QAM, labeling='natural'), False),
+    ('qam', dict(QAM, orders=(4, 8), base_amplitudes=(1.0, 2.0)), True),
+])
+def test_is_gray_labeling(kind, arguments, gray):
+    assert ber.is_gray_labeling(ber.make_modulation(kind, arguments)) == gray
+
+
+def test_theoretical_error_rates_of_bpsk_and_qpsk():
+    ebno_db = np.array([0.0, 4.0, 8.0])
+    expected = ber._qfunc(np.sqrt(2 * 10**(ebno_db / 10)))
+    ser, bit_error_rate = ber.theoretical_error_rates('psk', dict(PSK, order=2), ebno_db)
+    np.testing.assert_allclose(ser, expected)
+    np.testing.assert_allclose(bit_error_rate, expected)
+    _, bit_error_rate = ber.theoretical_error_rates('psk', dict(PSK, order=4), ebno_db)
+    np.testing.assert_allclose(bit_error_rate, expected * (1 - expected / 2))
+
+
+@pytest.mark.parametrize('kind, arguments', [('psk', PSK), ('qam', QAM)])
+def test_simulation_agrees_with_theory(kind, arguments):
+    ebno_db = 6.0
+    num_symbols, symbol_errors, bit_errors = ber.simulate_batches(kind, arguments, ebno_db, 4, seed=0)
+    assert num_symbols == 4 * config.BER_BATCH_SIZE
+    ser, bit_error_rate = ber.theoretical_error_rates(kind, arguments, ebno_db)
+    low, high = ber._wilson_interval(symbol_errors, num_symbols)
+    assert low <= ser <= high
+    modulation = ber.make_modulation(kind, arguments)
+    np.testing.assert_allclose(bit_errors / (num_symbols * modulation.bits_per_symbol), bit_error_rate, rtol=0.1)
+
+
+def test_split():
+    assert ber._split(10, 3) == [4, 3, 3]
+    assert ber._split(2, 5) == [1, 1]
+
+
+def test_converged():
+    assert ber._converged(10**6, config.BER_TARGET_ERRORS)
+    assert not ber._converged(10**6, 0)
+    assert not ber._converged(10**6, 5)
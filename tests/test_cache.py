@@ -0,0 +1,50 @@
+import numpy as np
+
+from cache import LRUCache, digest, make_key, sizeof
+
+
+def test_make_key_ignores_order_and_float_noise():
+    assert make_key({'a': 0.1 + 0.2, 'b': 1}) == make_key({'b': 1, 'a': 0.3})
+    assert digest(make_key({'a': 1})) != digest(make_key({'a': 2}))
+
+
+def test_sizeof_charges_views_their_base_once():
+    base = np.zeros(1000)
+    assert sizeof(base[:10]) == base.nbytes
+    assert sizeof({'x': base[:10], 'y': [base[10:20], base]}) == base.nbytes
+
+
+def test_sizeof_charges_objects_their_attributes():
+    class State:
+        def __init__(self):
+            self.output = {'x': np.zeros(1000)}
+    assert sizeof(State()) >= 8000
+
+
+def test_lru_order_and_count_bound():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.lookup('a') == 1
+    cache.put('c', 3)
+    assert cache.lookup('b') is None
+    assert cache.lookup('a') == 1 and cache.lookup('c') == 3
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+
+def test_byte_bound():
+    cache = LRUCache(max_size=100, max_bytes=3000)
+    cache.put('big', np.zeros(1000))
+    assert len(cache) == 0
+    for key in range(5):
+        cache.put(key, np.zeros(100))
+    assert len(cache) == 3 and cache.stats()['bytes'] == 2400
+    assert cache.lookup(0) is None and cache.lookup(4) is not None
+
+
+def test_get_computes_once():
+    cache = LRUCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get('key', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1
@@ -0,0 +1,175 @@
+import komm
+import numpy as np
+import pytest
+
+import dsp
+
+
+def _multiply_mod(a, b, modulus):
+    # Product of two polynomials over GF(2) (as bit masks), reduced modulo another
+    degree = modulus.bit_length() - 1
+    product = 0
+    while b:
+        if b & 1:
+            product ^= a
+        b >>= 1
+        a <<= 1
+        if a >> degree & 1:
+            a ^= modulus
+    return product
+
+
+def _power_of_x_mod(exponent, modulus):
+    result, base = 1, 0b10
+    while exponent:
+        if exponent & 1:
+            result = _multiply_mod(result, base, modulus)
+        base = _multiply_mod(base, base, modulus)
+        exponent >>= 1
+    return result
+
+
+def _prime_factors(n):
+    factors, p = set(), 2
+    while p * p <= n:
+        while n % p == 0:
+            factors.add(p)
+            n //= p
+        p += 1
+    if n > 1:
+        factors.add(n)
+    return factors
+
+
+@pytest.mark.parametrize('degree', sorted(dsp.PRIMITIVE_POLYNOMIALS))
+def test_primitive_polynomials_are_primitive(degree):
+    # x has multiplicative order 2**degree - 1 modulo the polynomial
+    polynomial = dsp.PRIMITIVE_POLYNOMIALS[degree]
+    order = 2**degree - 1
+    assert polynomial.bit_length() - 1 == degree
+    assert _power_of_x_mod(order, polynomial) == 1
+    assert all(_power_of_x_mod(order // p, polynomial) != 1 for p in _prime_factors(order))
+
+
+@pytest.mark.parametrize('degree', range(2, 17))
+def test_lfsr_sequence_matches_komm(degree):
+    feedback_polynomial = dsp.PRIMITIVE_POLYNOMIALS[degree]
+    expected = komm.LFSRSequence(feedback_polynomial).bit_sequence
+    np.testing.assert_array_equal(dsp.lfsr_sequence(feedback_polynomial), expected)
+
+
+@pytest.mark.parametrize('degree', [3, 10, 20])
+def test_cyclic_autocorrelation_of_maximum_length_sequence(degree):
+    polar_sequence = 1 - 2*dsp.lfsr_sequence(dsp.PRIMITIVE_POLYNOMIALS[degree]).astype(np.int64)
+    autocorrelation = dsp.cyclic_autocorrelation(polar_sequence)
+    assert autocorrelation[0] == len(polar_sequence)
+    assert np.all(autocorrelation[1:] == -1)
+
+
+@pytest.mark.parametrize('ordering', ['natural', 'sequency'])
+def test_walsh_hadamard_matrix_matches_komm(ordering):
+    length = 16
+    matrix = dsp.walsh_hadamard_matrix(length, ordering)
+    for index in range(length):
+        expected = komm.WalshHadamardSequence(length, ordering=ordering, index=index).polar_sequence
+        np.testing.assert_array_equal(matrix[index], expected)
+
+
+def test_raised_cosine_taps_match_komm_and_limit():
+    rolloff, samples_per_symbol, span_in_symbols = 0.5, 8, 8
+    taps = dsp.raised_cosine_taps(rolloff, samples_per_symbol, span_in_symbols)
+    t = dsp.tap_times(samples_per_symbol, span_in_symbols)
+    singular = np.isclose(np.abs(t), 1 / (2*rolloff))
+    expected = komm.RaisedCosinePulse(rolloff, length_in_symbols=span_in_symbols).impulse_response(t[~singular])
+    np.testing.assert_allclose(taps[~singular], expected, atol=1e-7)  # komm shifts t by 1e-8
+    # The value at the 0/0 points is the limit of the formula
+    t = 1 / (2*rolloff) + 1e-6
+    near = np.sinc(t) * np.cos(np.pi * rolloff * t) / (1 - (2 * rolloff * t)**2)
+    assert np.count_nonzero(singular) == 2
+    np.testing.assert_allclose(taps[singular], near, atol=1e-5)
+
+
+def _chunks(values, sizes=(1, 7, 100, 1000)):
+    start, i = 0, 0
+    while start < len(values):
+        yield values[start : start + sizes[i % len(sizes)]]
+        start += sizes[i % len(sizes)]
+        i += 1
+
+
+def test_overlap_save_correlator_matches_numpy():
+    random_state = np.random.RandomState(0)
+    signal, template = random_state.standard_normal(5000), random_state.standard_normal(13)
+    correlator = dsp.OverlapSaveCorrelator(template, fft_size=64)
+    output = np.concatenate([correlator.process(chunk) for chunk in _chunks(signal)] + [correlator.flush()])
+    np.testing.assert_allclose(output, np.correlate(signal, template, mode='valid'), atol=1e-9)
+
+
+def test_peak_detector_is_independent_of_chunking():
+    random_state = np.random.RandomState(0)
+    values = random_state.standard_normal(5000)
+    whole = dsp.PeakDetector(threshold=2.0, min_distance=5)
+    expected = whole.process(values) + whole.flush()
+    chunked = dsp.PeakDetector(threshold=2.0, min_distance=5)
+    peaks = sum((chunked.process(chunk) for chunk in _chunks(values)), []) + chunked.flush()
+    assert peaks == expected
+    positions = [position for position, _ in expected]
+    assert np.all(np.diff(positions) > 5)
+    assert all(values[position] == value for position, value in expected)
+
+
+def test_minmax_decimation_keeps_extremes_and_streams_alike():
+    random_state = np.random.RandomState(0)
+    y = random_state.standard_normal(10007)
+    x, decimated = dsp.minmax_decimate(y, 200)
+    assert len(decimated) <= 200
+    assert decimated.min() == y.min() and decimated.max() == y.max()
+    np.testing.assert_array_equal(y[x], decimated)
+    decimator = dsp.MinMaxDecimator(len(y), 200)
+    for chunk in _chunks(y):
+        decimator.push(chunk)
+    streamed_x, streamed_y = decimator.result()
+    np.testing.assert_array_equal(streamed_x, x)
+    np.testing.assert_array_equal(streamed_y, decimated)
+
+
+def test_polyphase_interpolator_matches_zero_stuffed_convolution():
+    random_state = np.random.RandomState(0)
+    samples_per_symbol = 4
+    taps = dsp.raised_cosine_taps(0.3, samples_per_symbol, 6)
+    symbols = random_state.choice([-1.0, 1.0], size=500)
+    interpolator = dsp.PolyphaseInterpolator(taps, samples_per_symbol)
+    output = np.concatenate([interpolator.process(chunk) for chunk in _chunks(symbols)])
+    upsampled = np.zeros(len(symbols) * samples_per_symbol)
+    upsampled[::samples_per_symbol] = symbols
+    np.testing.assert_allclose(output, np.convolve(upsampled, taps)[:len(output)], atol=1e-12)
+
+
+def test_welch_estimator_is_independent_of_chunking_and_flat_for_white_noise():
+    random_state = np.random.RandomState(0)
+    samples = random_state.standard_normal(2**16)
+    whole = dsp.WelchEstimator(256)
+    whole.push(samples)
+    chunked = dsp.WelchEstimator(256)
+    for chunk in _chunks(samples):
+        chunked.push(chunk)
+    frequencies, psd = whole.psd()
+    np.testing.assert_allclose(chunked.psd()[1], psd)
+    assert frequencies[0] == -0.5 and np.all(np.diff(frequencies) > 0)
+    np.testing.assert_allclose(np.mean(psd), 1.0, rtol=0.05)
+
+
+def test_quantization_error_statistics_match_direct_quantization():
+    random_state = np.random.RandomState(0)
+    samples = random_state.uniform(-1.5, 1.5, size=10000)
+    quantizers = [komm.UniformQuantizer(num_levels, 1.0, choice) for choice in ['mid-riser', 'mid-tread'] for num_levels in [2, 5, 8]]
+    statistics = dsp.QuantizationErrorStatistics(quantizers)
+    for chunk in _chunks(samples):
+        statistics.push(chunk)
+    result = statistics.result()
+    for i, quantizer in enumerate(quantizers):
+        error = quantizer(samples) - samples
+        np.testing.assert_allclose(result['error_mean'][i], np.mean(error), atol=1e-12)
+        np.testing.assert_allclose(result['error_rms'][i], np.sqrt(np.mean(error**2)), rtol=1e-9)
+        np.testing.assert_allclose(result['error_max'][i], np.max(np.abs(error)), rtol=1e-12)
+        np.testing.assert_allclose(result['sqnr_db'][i], 10*np.log10(np.sum(samples**2) / np.sum(error**2)), rtol=1e-9)
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return jobs.JobQueue(str(tmp_path / 'jobs'), max_running=2, stale_after=30, idle_timeout=15, max_results=2)
+
+
+def _wait(queue, job_id, states=('done', 'failed', 'cancelled')):
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = queue.status(job_id)
+        if status['state'] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError('Job {} still {}'.format(job_id, status))
+
+
+def test_results_round_trip_without_pickles(tmp_path):
+    result = {'x': np.arange(5.0), 'intervals': [np.zeros(2), np.ones(2)], 'title': 'QAM', 'elapsed': 1.5, 'flag': True}
+    path = str(tmp_path / 'result.npz')
+    with open(path, 'wb') as f:
+        f.write(jobs._dumps(result))
+    loaded = jobs._loads(path)
+    np.testing.assert_array_equal(loaded['x'], result['x'])
+    np.testing.assert_array_equal(loaded['intervals'], result['intervals'])
+    assert loaded['title'] == 'QAM' and loaded['elapsed'] == 1.5 and loaded['flag'] is True
+    # A file holding a pickled object is refused rather than unpickled
+    with open(path, 'wb') as f:
+        f.write(jobs._dumps({'object': {'not': 'an array'}}))
+    with pytest.raises(ValueError):
+        jobs._loads(path)
+
+
+def test_shared_directory_is_refused(tmp_path):
+    directory = tmp_path / 'shared'
+    directory.mkdir()
+    os.chmod(str(directory), 0o777)
+    with pytest.raises(RuntimeError):
+        jobs.JobQueue(str(directory))
+
+
+def test_inline_job_is_done_on_return_and_not_run_again(queue):
+    calls = []
+
+    def compute(progress):
+        calls.append(1)
+        progress(0.5)
+        return {'value': np.array([1, 2, 3])}
+
+    job_id = queue.submit(('key', 1), compute, inline=True)
+    assert queue.status(job_id)['state'] == 'done'
+    np.testing.assert_array_equal(queue.result(job_id)['value'], [1, 2, 3])
+    assert queue.submit(('key', 1), compute, inline=True) == job_id
+    assert len(calls) == 1
+
+
+def test_background_job_reports_partial_results(queue):
+    reported, finish = threading.Event(), threading.Event()
+
+    def compute(progress):
+        progress(0.5, partial={'estimate': np.ones(3)})
+        reported.set()
+        finish.wait(10)
+        return {'estimate': np.full(3, 2.0)}
+
+    job_id = queue.submit(('key', 2), compute)
+    assert reported.wait(10)
+    assert queue.status(job_id) == {'state': 'running', 'progress': 0.5, 'error': None}
+    np.testing.assert_array_equal(queue.partial_result(job_id)['estimate'], np.ones(3))
+    assert queue.submit(('key', 2), compute) == job_id  # Joins the running job
+    finish.set()
+    _wait(queue, job_id)
+    np.testing.assert_array_equal(queue.result(job_id)['estimate'], np.full(3, 2.0))
+    assert queue.partial_result(job_id) is None
+
+
+def test_cancelled_job_stops_at_its_next_progress_report(queue):
+    def compute(progress):
+        while True:
+            progress(0.0)
+            time.sleep(0.01)
+
+    job_id = queue.submit(('key', 3), compute)
+    queue.cancel(job_id)
+    assert _wait(queue, job_id)['state'] == 'cancelled'
+
+
+def test_failed_job_reports_its_error(queue):
+    def compute(progress):
+        raise ValueError('bad parameter')
+
+    job_id = queue.submit(('key', 4), compute)
+    status = _wait(queue, job_id)
+    assert status['state'] == 'failed' and 'bad parameter' in status['error']
+
+
+def test_only_the_newest_results_are_kept(queue):
+    job_ids = []
+    for i in range(3):
+        job_ids.append(queue.submit(('key', 5, i), lambda progress: {'i': 0}, inline=True))
+        time.sleep(0.01)
+    assert [queue.status(job_id)['state'] for job_id in job_ids] == ['unknown', 'done', 'done']
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import numpy as np
+
+from sessions import SessionStore
+
+
+class State:
+    def __init__(self, size=100):
+        self.output = np.zeros(size)
+
+
+def test_same_session_same_state():
+    store = SessionStore(factory=State)
+    assert store.get('a') is store.get('a')
+    assert store.get('a') is not store.get('b')
+    assert store.get(None) is not store.get(None)
+
+
+def test_count_bound_evicts_least_recently_used():
+    store = SessionStore(factory=State, max_size=2)
+    a = store.get('a')
+    store.get('b')
+    store.get('a')
+    store.get('c')
+    assert len(store) == 2
+    assert store.get('a') is a
+
+
+def test_byte_bound_follows_state_growth():
+    store = SessionStore(factory=State, max_bytes=3000)
+    for session in 'abc':
+        store.get(session)
+    assert len(store) == 3
+    store.get('c').output = np.zeros(300)
+    store.get('c')  # Measured again as it comes back
+    assert len(store) == 1
+    store.get('c').output = np.zeros(1000)
+    store.get('c')  # The current session is kept even alone over the bound
+    assert len(store) == 1
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(factory=State, ttl=0.05)
+    a = store.get('a')
+    time.sleep(0.1)
+    assert store.get('a') is not a
+
+
+def test_concurrent_requests_of_a_new_session_share_one_state():
+    created = []
+
+    def factory():
+        created.append(1)
+        time.sleep(0.05)
+        return State()
+
+    store = SessionStore(factory=factory)
+    states = []
+    threads = [threading.Thread(target=lambda: states.append(store.get('a'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(state is states[0] for state in states)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import ber
+from slicer import Slicer
+
+
+def _nearest(constellation, received):
+    return np.argmin(np.abs(received[:, np.newaxis] - constellation[np.newaxis, :]), axis=1)
+
+
+@pytest.mark.parametrize('kind, arguments, separable', [
+    ('qam', dict(orders=16, base_amplitudes=1.0, phase_offset=0.0, labeling='reflected_2d'), True),
+    ('qam', dict(orders=(4, 8), base_amplitudes=(1.0, 0.5), phase_offset=np.pi/7, labeling='natural'), True),
+    ('psk', dict(order=8, amplitude=1.0, phase_offset=0.1, labeling='reflected'), False),
+    ('psk', dict(order=4, amplitude=2.0, phase_offset=0.0, labeling='natural'), False),
+])
+def test_decisions_are_nearest_points(kind, arguments, separable):
+    modulation = ber.make_modulation(kind, arguments)
+    constellation = modulation.constellation
+    slicer = Slicer(constellation, rotation=arguments['phase_offset'] if kind == 'qam' else 0.0)
+    assert slicer.separable == separable
+    random_state = np.random.RandomState(0)
+    received = constellation[random_state.randint(len(constellation), size=20000)]
+    received = received + random_state.standard_normal(2*len(received)).view(complex)
+    np.testing.assert_array_equal(slicer(received), _nearest(constellation, received))
+
+
+def test_boundaries():
+    square = Slicer(ber.make_modulation('qam', dict(orders=16, base_amplitudes=1.0, phase_offset=0.0, labeling='natural')).constellation)
+    assert len(square.boundaries()) == 3 + 3
+    psk = Slicer(ber.make_modulation('psk', dict(order=8, amplitude=1.0, phase_offset=0.0, labeling='natural')).constellation)
+    assert len(psk.boundaries()) == 8
+    assert Slicer([0, 1, 3]).boundaries() == []